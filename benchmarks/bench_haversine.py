@@ -0,0 +1,267 @@
+"""
+Benchmarks of haversine, reporting the throughput (points per second) and peak memory of
+its functions over a range of sizes, for each backend.
+
+Usage::
+
+    python benchmarks/bench_haversine.py                              # print results
+    python benchmarks/bench_haversine.py --max-size 100000000        # up to 10^8 points
+    python benchmarks/bench_haversine.py --json before.json          # save results
+    python benchmarks/bench_haversine.py --compare before.json       # report regressions
+
+Points are computed distances (or destinations, for inverse_haversine_vector). Peak memory
+is the memory allocated during a call, as traced by tracemalloc, inputs not included.
+With ``--compare``, the exit status is 1 if a case is slower than in the given results
+by more than ``--threshold``.
+"""
+from datetime import datetime, timezone
+from importlib import import_module
+from math import inf, isqrt
+from pathlib import Path
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy
+
+# Benchmark the working tree rather than an installed version
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import haversine  # noqa: E402
+
+
+def _points(rng, n):
+    return numpy.column_stack((rng.uniform(-90, 90, n), rng.uniform(-180, 180, n)))
+
+
+def bench_scalar(rng, size):
+    pairs = list(zip(_points(rng, size).tolist(), _points(rng, size).tolist()))
+    return lambda: [haversine.haversine(point1, point2) for point1, point2 in pairs], size
+
+
+def bench_kernel(rng, size):
+    # Raw scalar kernel, without the unit conversion and checks of haversine
+    kernel = import_module('haversine.haversine')._haversine_kernel
+    coordinates = numpy.hstack((_points(rng, size), _points(rng, size))).tolist()
+    return lambda: [kernel(lat1, lng1, lat2, lng2) for lat1, lng1, lat2, lng2 in coordinates], size
+
+
+def bench_cached(rng, size):
+    # Pairs of 100 popular points, all of them cached after the first call
+    points = _points(rng, 100).tolist()
+    pairs = [(points[i], points[j]) for i, j in rng.integers(0, 100, size=(size, 2))]
+    cache = haversine.HaversineCache(maxsize=100 * 100)
+    return lambda: [cache.haversine(point1, point2) for point1, point2 in pairs], size
+
+
+def bench_cached_miss(rng, size):
+    # Distinct pairs in a new cache, all of them missed
+    pairs = list(zip(_points(rng, size).tolist(), _points(rng, size).tolist()))
+
+    def func():
+        cache = haversine.HaversineCache(maxsize=size)
+        return [cache.haversine(point1, point2) for point1, point2 in pairs]
+    return func, size
+
+
+def bench_vector(rng, size):
+    points1, points2 = _points(rng, size), _points(rng, size)
+    return lambda: haversine.haversine_vector(points1, points2, check=False), size
+
+
+def bench_accurate(rng, size):
+    points1, points2 = _points(rng, size), _points(rng, size)
+    return lambda: haversine.haversine_vector(points1, points2, check=False, precision='accurate'), size
+
+
+def bench_hybrid(rng, size):
+    # Uniform points, of which about 2% are far enough apart for the accurate formula
+    points1, points2 = _points(rng, size), _points(rng, size)
+    return lambda: haversine.haversine_vector(points1, points2, check=False, precision='hybrid'), size
+
+
+def bench_hybrid_far(rng, size):
+    # Nearly antipodal points, all computed with the accurate formula
+    points1 = _points(rng, size)
+    points2 = numpy.column_stack((-points1[:, 0], points1[:, 1] - numpy.copysign(179.9, points1[:, 1])))
+    return lambda: haversine.haversine_vector(points1, points2, check=False, precision='hybrid'), size
+
+
+def bench_check(rng, size):
+    points1, points2 = _points(rng, size), _points(rng, size)
+    return lambda: haversine.haversine_vector(points1, points2), size
+
+
+def bench_normalize(rng, size):
+    points1, points2 = _points(rng, size) * 3, _points(rng, size) * 3
+    return lambda: haversine.haversine_vector(points1, points2, normalize=True), size
+
+
+def bench_comb(rng, size):
+    # Square matrix of about size distances
+    n = max(isqrt(size), 1)
+    points1, points2 = _points(rng, n), _points(rng, n)
+    return lambda: haversine.haversine_vector(points1, points2, comb=True, check=False), n * n
+
+
+def bench_pairs_within(rng, size):
+    # Pairs within 10 km among about size pairs of points of a region, as for geofencing
+    n = max(isqrt(size), 1)
+    points1, points2 = (numpy.column_stack((rng.uniform(40, 50, n), rng.uniform(0, 10, n))) for _ in range(2))
+    return lambda: haversine.pairs_within(points1, points2, 10), n * n
+
+
+def bench_grid_join(rng, size):
+    # Same pairs as bench_pairs_within, through grids of cells about as large as the distance
+    n = max(isqrt(size), 1)
+    points1, points2 = (numpy.column_stack((rng.uniform(40, 50, n), rng.uniform(0, 10, n))) for _ in range(2))
+    return lambda: haversine.HaversineGrid(points1, 0.1).join(points2, 10), n * n
+
+
+def bench_inverse(rng, size):
+    points = _points(rng, size)
+    distances, directions = rng.uniform(0, 1000, size), rng.uniform(0, 6.3, size)
+    return lambda: haversine.inverse_haversine_vector(points, distances, directions), size
+
+
+# Benchmarked cases: function creating the benchmarked call for a size, and maximal size if
+# smaller than --max-size (e.g. for Python loops).
+CASES = {
+    'scalar': (bench_scalar, 10 ** 6),
+    'kernel': (bench_kernel, 10 ** 6),
+    'cached': (bench_cached, 10 ** 6),
+    'cached_miss': (bench_cached_miss, 10 ** 6),
+    'vector': (bench_vector, None),
+    'accurate': (bench_accurate, None),
+    'hybrid': (bench_hybrid, None),
+    'hybrid_far': (bench_hybrid_far, None),
+    'check': (bench_check, None),
+    'normalize': (bench_normalize, None),
+    'comb': (bench_comb, None),
+    'within': (bench_pairs_within, None),
+    'grid': (bench_grid_join, None),
+    'inverse': (bench_inverse, None),
+}
+
+
+def available_backends():
+    backends = ['numpy']
+    try:
+        import numba  # type: ignore # noqa: F401
+        backends.append('numba')
+    except ModuleNotFoundError:
+        pass
+    return backends
+
+
+def measure_time(func, min_time):
+    """
+    Best time of calls to func, repeated for at least min_time seconds and 3 calls,
+    after a first call warming up caches (and compiling numba kernels).
+    """
+    func()
+    best, total, calls = inf, 0.0, 0
+    while total < min_time or calls < 3:
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best, total, calls = min(best, elapsed), total + elapsed, calls + 1
+    return best
+
+
+def measure_peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(cases, backends, sizes, min_time):
+    rng = numpy.random.default_rng(0)
+    for backend in backends:
+        # Scalar functions follow set_backend, vector ones use_backend
+        haversine.set_backend(backend)
+        for case in cases:
+            create, max_size = CASES[case]
+            for size in sizes:
+                if max_size is not None and size > max_size:
+                    continue
+                func, points = create(rng, size)
+                with haversine.use_backend(backend):
+                    seconds = measure_time(func, min_time)
+                    peak_memory = measure_peak_memory(func)
+                del func
+                yield {'case': case, 'backend': backend, 'size': points, 'seconds': seconds,
+                       'points_per_second': points / seconds, 'peak_memory': peak_memory}
+    haversine.set_backend(None)
+
+
+def format_result(result):
+    return (f"{result['case']:<11} {result['backend']:<8} {result['size']:>11} {result['seconds'] * 1e3:>12.4f} ms "
+            f"{result['points_per_second'] / 1e6:>10.2f} M/s {result['peak_memory'] / 2 ** 20:>10.2f} MiB")
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the slowdown of each result relative to the same case of baseline, and return the
+    number of cases slower by more than threshold.
+    """
+    baseline = {(r['case'], r['backend'], r['size']): r for r in baseline['results']}
+    regressions = 0
+    for result in results:
+        previous = baseline.get((result['case'], result['backend'], result['size']))
+        if previous is None:
+            continue
+        ratio = previous['points_per_second'] / result['points_per_second']
+        regression = ratio > threshold
+        regressions += regression
+        print(f"{result['case']:<11} {result['backend']:<8} {result['size']:>11} {ratio:>8.2f}x slower"
+              + (" REGRESSION" if regression else ""))
+    return regressions
+
+
+def metadata():
+    versions = {'python': platform.python_version(), 'numpy': numpy.__version__}
+    try:
+        import numba  # type: ignore
+        versions['numba'] = numba.__version__
+    except ModuleNotFoundError:
+        pass
+    return {'date': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'platform': platform.platform(),
+            'machine': platform.machine(), 'versions': versions}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--case', action='append', choices=list(CASES), help="case to run (default: all)")
+    parser.add_argument('--backend', action='append', help="backend to run (default: all installed)")
+    parser.add_argument('--max-size', type=float, default=10 ** 6, help="largest size, sizes being powers of 10 from 1")
+    parser.add_argument('--min-time', type=float, default=0.2, help="minimal time spent measuring each size, in seconds")
+    parser.add_argument('--json', type=Path, help="write the results to this JSON file")
+    parser.add_argument('--compare', type=Path, help="compare the results to this JSON file")
+    parser.add_argument('--threshold', type=float, default=1.1,
+                        help="slowdown from which a comparison is a regression (default: 1.1)")
+    args = parser.parse_args(argv)
+
+    sizes = [10 ** exponent for exponent in range(len(str(int(args.max_size))))]
+    print(f"{'case':<11} {'backend':<8} {'size':>11} {'time':>15} {'throughput':>14} {'peak memory':>14}")
+    results = []
+    for result in run(args.case or list(CASES), args.backend or available_backends(), sizes, args.min_time):
+        print(format_result(result), flush=True)
+        results.append(result)
+
+    if args.json:
+        args.json.write_text(json.dumps({'metadata': metadata(), 'results': results}, indent=2))
+    if args.compare:
+        print()
+        if compare(results, json.loads(args.compare.read_text()), args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
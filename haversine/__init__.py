@@ -1 +1,14 @@
-from .haversine import Unit, haversine, haversine_vector, Direction, inverse_haversine, inverse_haversine_vector
+from .haversine import Unit, haversine, haversine_many, haversine_stream, haversine_vector, haversine_vector_blocks, haversine_vector_columns, haversine_pdist, pairs_within, PreparedPoints, path_length, path_lengths, cumulative_distance, Direction, Precision, inverse_haversine, inverse_haversine_vector, warmup, set_backend, get_backend, use_backend, register_backend, enable_stats, disable_stats, reset_stats, stats
+from .aio import haversine_vector_async, inverse_haversine_vector_async
+from .cache import DistanceMatrixCache, HaversineCache
+
+
+def __getattr__(name):
+    # HaversineIndex and HaversineGrid require numpy, whose import is deferred until needed
+    if name == 'HaversineIndex':
+        from .index import HaversineIndex
+        return HaversineIndex
+    if name == 'HaversineGrid':
+        from .grid import HaversineGrid
+        return HaversineGrid
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,151 @@
+from functools import partial
+from weakref import WeakKeyDictionary
+
+from .haversine import Unit, haversine_vector, inverse_haversine_vector, _as_points_array, _get_backend
+
+# Number of computed elements from which computations run on an executor rather than in the
+# event loop, where they would hold up other tasks for too long.
+_ASYNC_OFFLOAD_MIN_SIZE = 10_000
+
+# Batcher of each running event loop
+_batchers = WeakKeyDictionary()
+
+
+async def haversine_vector_async(array1, array2, unit=Unit.KILOMETERS, comb=False, normalize=False, check=True,
+                                 executor=None):
+    '''
+    Async version of ``haversine_vector``, for event loops (e.g. asyncio web servers) that must
+    not be blocked by large computations.
+
+    Large computations run on ``executor`` (the default executor of the event loop if None),
+    numpy and numba releasing the GIL meanwhile. Small ones requested concurrently, i.e. during
+    the same iteration of the event loop, are batched together in a single computation,
+    which costs much less than computing each of them.
+
+    Example::
+
+        async def handler(request):
+            distances = await haversine_vector_async(request.points, stores, comb=True)
+    '''
+    backend = _get_backend(None, 'haversine_vector_async')
+    array1, array2 = _as_points_array(array1), _as_points_array(array2)
+    kwargs = dict(unit=unit, normalize=normalize, check=check, backend=backend)
+    if comb:
+        return await _compute(partial(haversine_vector, array1, array2, comb=True, **kwargs),
+                              len(array1) * len(array2), executor)
+    return await _submit(haversine_vector, (array1, array2), kwargs, executor)
+
+
+async def inverse_haversine_vector_async(array, distance, direction, unit=Unit.KILOMETERS, normalize_output=False,
+                                         comb=False, executor=None):
+    '''
+    Async version of ``inverse_haversine_vector``, see ``haversine_vector_async``.
+    '''
+    backend = _get_backend(None, 'inverse_haversine_vector_async', 'inverse_haversine')
+    import numpy
+    array = _as_points_array(array)
+    distance, direction = numpy.asarray(distance), numpy.asarray(direction)
+    kwargs = dict(unit=unit, normalize_output=normalize_output, backend=backend)
+    if comb:
+        return await _compute(partial(inverse_haversine_vector, array, distance, direction, comb=True, **kwargs),
+                              len(array) * distance.size * direction.size, executor)
+    return await _submit(inverse_haversine_vector, (array, distance, direction), kwargs, executor)
+
+
+async def _compute(func, size, executor):
+    """
+    Return func(), computed on executor if size is too large to be computed in the event loop.
+    """
+    if size < _ASYNC_OFFLOAD_MIN_SIZE:
+        return func()
+    import asyncio
+    return await asyncio.get_running_loop().run_in_executor(executor, func)
+
+
+async def _submit(func, args, kwargs, executor):
+    """
+    Return func(*args, **kwargs), args being arrays of the same length: batched with other
+    small requests of the same kind, or computed on its own if large.
+    """
+    import asyncio
+    size = len(args[0])
+    if size >= _ASYNC_OFFLOAD_MIN_SIZE or any(arg.ndim == 0 or len(arg) != size for arg in args):
+        # Mismatching arrays are not batched, so that the error is raised for their request only
+        return await _compute(partial(func, *args, **kwargs), size, executor)
+
+    loop = asyncio.get_running_loop()
+    batcher = _batchers.get(loop)
+    if batcher is None:
+        batcher = _batchers[loop] = _Batcher()
+    return await batcher.submit(loop, func, args, kwargs, executor)
+
+
+class _Batcher:
+    """
+    Requests pending in an event loop, computed together on its next iteration: with a single
+    call to the function for requests of the same function and options.
+
+    The loop is not kept by the batcher, which would keep it alive in ``_batchers``.
+    """
+
+    def __init__(self):
+        self._pending = {}
+
+    def submit(self, loop, func, args, kwargs, executor):
+        future = loop.create_future()
+        if not self._pending:
+            loop.call_soon(self._flush, loop)
+        self._pending.setdefault((func, tuple(kwargs.items()), executor), []).append((args, future))
+        return future
+
+    def _flush(self, loop):
+        pending, self._pending = self._pending, {}
+        for (func, kwargs, executor), requests in pending.items():
+            requests = [(args, future) for args, future in requests if not future.cancelled()]
+            if not requests:
+                continue
+            batch = partial(_compute_batch, func, dict(kwargs), [args for args, _ in requests])
+            futures = [future for _, future in requests]
+            if sum(len(args[0]) for args, _ in requests) < _ASYNC_OFFLOAD_MIN_SIZE:
+                _set_outcomes(futures, batch())
+            else:
+                loop.run_in_executor(executor, batch).add_done_callback(
+                    lambda done, futures=futures: _set_outcomes(futures, done.result()))
+
+
+def _compute_batch(func, kwargs, requests):
+    """
+    Compute func(*args, **kwargs) for the args of each request, with a single call to func on
+    the concatenated args. Return a list of (exception, result) tuples, one per request: if the
+    batch fails, requests are computed one by one so that only the failing ones get the error.
+    """
+    import numpy
+    if len(requests) > 1:
+        try:
+            result = func(*(numpy.concatenate(arrays) for arrays in zip(*requests)), **kwargs)
+        except Exception:
+            pass
+        else:
+            splits = numpy.cumsum([len(args[0]) for args in requests])[:-1]
+            if isinstance(result, tuple):
+                return [(None, r) for r in zip(*(numpy.split(array, splits) for array in result))]
+            return [(None, r) for r in numpy.split(result, splits)]
+
+    outcomes = []
+    for args in requests:
+        try:
+            outcomes.append((None, func(*args, **kwargs)))
+        except Exception as e:
+            outcomes.append((e, None))
+    return outcomes
+
+
+def _set_outcomes(futures, outcomes):
+    for future, (exception, result) in zip(futures, outcomes):
+        # Requests may have been cancelled meanwhile
+        if future.done():
+            continue
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
@@ -0,0 +1,252 @@
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+
+from .haversine import Unit, haversine, inverse_haversine, haversine_vector, _as_points_array
+
+_DEFAULT_CACHE_BYTES = 256 * 1024 ** 2
+_DEFAULT_CACHE_SIZE = 4096
+
+
+class _CachedMatrix:
+    __slots__ = ('points1', 'points2', 'matrix', 'nbytes')
+
+    def __init__(self, points1, points2, matrix):
+        self.points1 = points1
+        self.points2 = points2
+        self.matrix = matrix
+        self.nbytes = matrix.nbytes + points1.nbytes + points2.nbytes
+
+
+def _as_cached_points(array):
+    import numpy
+    points = numpy.array(_as_points_array(array), dtype=float, order='C')
+    points.flags.writeable = False
+    return points
+
+
+def _digest(points):
+    from hashlib import blake2b
+    return blake2b(points.data, digest_size=16).digest()
+
+
+class DistanceMatrixCache:
+    """
+    Least recently used cache of the combination matrices of ``haversine_vector``, bounded
+    by the size of the cached matrices in bytes.
+
+    Matrices are keyed by a hash of the points of both arrays and by the unit. When points are
+    appended to the arrays of a cached matrix, only the distances of the new points are
+    computed and the larger matrix replaces the cached one. Matrices of the first points of
+    the arrays of a cached matrix are returned as views of it, without any computation.
+
+    Returned matrices are read-only, as they are shared with the cache: copy them to modify them.
+
+    Example::
+
+        cache = DistanceMatrixCache(max_bytes=512 * 1024 ** 2)
+
+        def handle(request):
+            distances = cache.matrix(depots, request.customers)
+    """
+
+    def __init__(self, max_bytes=_DEFAULT_CACHE_BYTES):
+        """
+        :param max_bytes: upper bound in bytes for the cached matrices and their points. Matrices
+                          larger than this are computed but not cached.
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self._hits = self._partial_hits = self._misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def matrix(self, array1, array2, unit=Unit.KILOMETERS, normalize=False, check=True, backend=None) -> "numpy.ndarray":
+        """
+        Return ``haversine_vector(array1, array2, unit, comb=True, normalize=normalize)``, from
+        the cache if possible.
+
+        :param array1: array of (latitude, longitude) points in decimal degrees
+        :param array2: array of (latitude, longitude) points in decimal degrees
+        :param check: if True, check that points not cached yet are normalized.
+        :param backend: backend of the computation, see ``set_backend``; the current one if None.
+        :return: read-only matrix of shape ``(len(array2), len(array1))``.
+        """
+        import numpy
+        points1, points2 = _as_cached_points(array1), _as_cached_points(array2)
+        unit = Unit(unit)
+        key = (_digest(points1), _digest(points2), unit, normalize)
+        n1, n2 = len(points1), len(points2)
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return cached.matrix
+            overlap = self._largest_overlap(points1, points2, unit, normalize)
+            if overlap is not None:
+                overlap_key, cached, m1, m2 = overlap
+                if m1 == n1 and m2 == n2:
+                    self._entries.move_to_end(overlap_key)
+                    self._hits += 1
+                    return cached.matrix[:n2, :n1]
+
+        def compute(points1, points2):
+            return haversine_vector(points1, points2, unit, comb=True, normalize=normalize, check=check,
+                                    backend=backend)
+
+        if overlap is None:
+            matrix = compute(points1, points2)
+        else:
+            # Only compute the distances of the points past the ones of the cached matrix
+            matrix = numpy.empty((n2, n1))
+            matrix[:m2, :m1] = cached.matrix[:m2, :m1]
+            if m1 < n1:
+                matrix[:m2, m1:] = compute(points1[m1:], points2[:m2])
+            if m2 < n2:
+                matrix[m2:] = compute(points1, points2[m2:])
+        matrix.flags.writeable = False
+
+        with self._lock:
+            if overlap is None:
+                self._misses += 1
+            else:
+                self._partial_hits += 1
+                # The new matrix holds the whole cached one, which is no longer needed
+                if len(cached.points1) <= n1 and len(cached.points2) <= n2:
+                    self._remove(overlap_key)
+            self._add(key, _CachedMatrix(points1, points2, matrix))
+        return matrix
+
+    def _largest_overlap(self, points1, points2, unit, normalize):
+        """
+        Return ``(key, cached, m1, m2)`` for the cached matrix of the given unit sharing the
+        largest block with the requested one: the ``m1`` first points of its array1 and ``m2``
+        first points of its array2 are the first points of points1 and points2. None if none do.
+        """
+        import numpy
+        best, best_size = None, 0
+        for key, cached in self._entries.items():
+            if key[2:] != (unit, normalize):
+                continue
+            m1, m2 = min(len(cached.points1), len(points1)), min(len(cached.points2), len(points2))
+            if (m1 * m2 > best_size and numpy.array_equal(cached.points1[:m1], points1[:m1])
+                    and numpy.array_equal(cached.points2[:m2], points2[:m2])):
+                best, best_size = (key, cached, m1, m2), m1 * m2
+        return best
+
+    def _add(self, key, cached):
+        if cached.nbytes > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = cached
+        self._bytes += cached.nbytes
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        cached = self._entries.pop(key, None)
+        if cached is not None:
+            self._bytes -= cached.nbytes
+
+    def clear(self):
+        """
+        Remove all the cached matrices, and reset the counters of ``info``.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = self._partial_hits = self._misses = 0
+
+    def info(self) -> dict:
+        """
+        Return the counters of the cache: ``hits`` (matrices returned from the cache),
+        ``partial_hits`` (matrices computed in part), ``misses`` (matrices computed in full),
+        ``entries`` (number of cached matrices) and ``bytes`` (their size).
+        """
+        with self._lock:
+            return {'hits': self._hits, 'partial_hits': self._partial_hits, 'misses': self._misses,
+                    'entries': len(self._entries), 'bytes': self._bytes}
+
+
+class HaversineCache:
+    """
+    Memoized ``haversine`` and ``inverse_haversine``, for calls repeating the same points
+    (e.g. popular stations or airports), each with a least recently used cache of ``maxsize``
+    entries.
+
+    With ``decimals``, coordinates are rounded to this number of decimals before looking up
+    the cache, so that nearby points share entries: results are then the ones of the rounded
+    coordinates (5 decimals are about a metre).
+
+    A miss costs about twice as much as a call to ``haversine``, and a hit about a third, so
+    caching pays off with hit rates above about a half: check them with ``info``.
+
+    Example::
+
+        cache = HaversineCache(maxsize=100_000, decimals=5)
+        distance = cache.haversine(station, airport)
+    """
+
+    def __init__(self, maxsize=_DEFAULT_CACHE_SIZE, decimals=None):
+        """
+        :param maxsize: maximal number of entries of each cache, None for no limit.
+        :param decimals: number of decimals the coordinates are rounded to, None to use them as is.
+        """
+        self.decimals = decimals
+        self._haversine = lru_cache(maxsize)(self._haversine_coordinates)
+        self._inverse_haversine = lru_cache(maxsize)(self._inverse_haversine_coordinates)
+
+    @staticmethod
+    def _haversine_coordinates(lat1, lng1, lat2, lng2, unit, normalize, check):
+        return haversine((lat1, lng1), (lat2, lng2), unit, normalize, check)
+
+    @staticmethod
+    def _inverse_haversine_coordinates(lat, lng, distance, direction, unit, normalize_output):
+        return inverse_haversine((lat, lng), distance, direction, unit, normalize_output)
+
+    def haversine(self, point1, point2, unit=Unit.KILOMETERS, normalize=False, check=True) -> float:
+        """
+        Return ``haversine(point1, point2, unit, normalize, check)``, from the cache if possible.
+        """
+        lat1, lng1 = point1
+        lat2, lng2 = point2
+        decimals = self.decimals
+        if decimals is not None:
+            lat1, lng1 = round(lat1, decimals), round(lng1, decimals)
+            lat2, lng2 = round(lat2, decimals), round(lng2, decimals)
+        return self._haversine(lat1, lng1, lat2, lng2, unit, normalize, check)
+
+    def inverse_haversine(self, point, distance, direction, unit=Unit.KILOMETERS, normalize_output=False):
+        """
+        Return ``inverse_haversine(point, distance, direction, unit, normalize_output)``, from
+        the cache if possible. Only the coordinates of ``point`` are rounded to ``decimals``.
+        """
+        lat, lng = point
+        decimals = self.decimals
+        if decimals is not None:
+            lat, lng = round(lat, decimals), round(lng, decimals)
+        return self._inverse_haversine(lat, lng, distance, direction, unit, normalize_output)
+
+    def clear(self):
+        """
+        Remove all the cached results, and reset the counters of ``info``.
+        """
+        self._haversine.cache_clear()
+        self._inverse_haversine.cache_clear()
+
+    def info(self) -> dict:
+        """
+        Return the counters of the caches of ``haversine`` and ``inverse_haversine``: ``hits``,
+        ``misses``, ``hit_rate`` (hits over lookups, 0 before any), ``size`` and ``maxsize``.
+        """
+        info = {}
+        for name, function in (('haversine', self._haversine), ('inverse_haversine', self._inverse_haversine)):
+            hits, misses, maxsize, size = function.cache_info()
+            info[name] = {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+                          'size': size, 'maxsize': maxsize}
+        return info
@@ -0,0 +1,158 @@
+from math import ceil, pi
+from typing import Tuple
+
+import numpy
+
+from .haversine import (Unit, get_avg_earth_radius, pairs_within, _as_points_array, _unpack_points, _get_backend,
+                        _DEFAULT_MAX_MEMORY, _PAIRS_BYTES_PER_CANDIDATE)
+
+
+def _cell_pairs_points(starts1, counts1, starts2, counts2):
+    """
+    Positions, in the points sorted by cell, of all the pairs of points of the given pairs of cells.
+    """
+    sizes = counts1 * counts2
+    offsets = numpy.arange(sizes.sum()) - numpy.repeat(numpy.cumsum(sizes) - sizes, sizes)
+    widths = numpy.repeat(counts2, sizes)
+    return numpy.repeat(starts1, sizes) + offsets // widths, numpy.repeat(starts2, sizes) + offsets % widths
+
+
+class HaversineGrid:
+    """
+    Set of (lat, lon) points bucketed into the cells of a regular latitude/longitude grid,
+    for proximity joins that skip most pairs of points.
+
+    The distance between points of two cells is within the radii of the cells (the distance
+    from their centre to their farthest corner) of the distance between their centres. Joins
+    compute these bounds for the pairs of nearby cells with the haversine kernel: pairs of
+    cells farther apart than the maximal distance are skipped, pairs of cells closer than it
+    are accepted as a whole, and only the points of the remaining pairs of cells are measured.
+    Kernels are the ones of the current backend (see ``set_backend``), which must be numpy based.
+
+    Example::
+
+        stores = HaversineGrid(store_coordinates, cell_size=0.1)
+        i, j = stores.join(customers, 5, Unit.KILOMETERS)
+    """
+
+    def __init__(self, points, cell_size=1.0, normalize=False, check=True):
+        """
+        :param points: array of (latitude, longitude) points in decimal degrees
+        :param cell_size: size of the cells, in decimal degrees of both latitude and longitude.
+                          Joins are the fastest with cells about as large as their maximal distance,
+                          holding several points each.
+        :param normalize: if True, normalize the points to [-90, 90] latitude and [-180, 180] longitude.
+        :param check: if True, check that points are normalized.
+        """
+        if not 0 < cell_size <= 90:
+            raise ValueError(f"cell_size must be in ]0, 90], got {cell_size}")
+        backend = _get_backend(None, 'HaversineGrid')
+        lat, lng = _unpack_points(_as_points_array(points), normalize, check, backend=backend)
+        self.cell_size = cell_size
+
+        n_rows, n_cols = ceil(180 / cell_size), ceil(360 / cell_size)
+        rows = numpy.minimum(((lat + 90) // cell_size).astype(numpy.intp), n_rows - 1)
+        cols = numpy.minimum(((lng + 180) // cell_size).astype(numpy.intp), n_cols - 1)
+        keys = rows * n_cols + cols
+        # Points sorted by cell: the points of the n-th cell are at _starts[n]:_starts[n] + _counts[n]
+        self._order = numpy.argsort(keys, kind='stable')
+        self._lat, self._lng = lat[self._order], lng[self._order]
+        cells, self._starts, self._counts = numpy.unique(keys[self._order], return_index=True, return_counts=True)
+
+        lat_lo = cells // n_cols * cell_size - 90.0
+        lng_lo = cells % n_cols * cell_size - 180.0
+        lat_hi, lng_hi = numpy.minimum(lat_lo + cell_size, 90.0), numpy.minimum(lng_lo + cell_size, 180.0)
+        self._cell_lat, self._cell_lng = (lat_lo + lat_hi) / 2, (lng_lo + lng_hi) / 2
+        # Angular radius of the cells: the farthest corners are either the ones on the side of
+        # the equator or the ones on the side of the pole. It is slightly enlarged so that
+        # points on the edges of the cells are not lost to rounding.
+        kernel = backend.haversine_kernel_vector
+        radius = numpy.maximum(kernel(self._cell_lat, self._cell_lng, lat_lo, lng_lo),
+                               kernel(self._cell_lat, self._cell_lng, lat_hi, lng_lo))
+        self._cell_radius = radius * (1 + 1e-9) + 1e-12
+
+    def __len__(self):
+        return len(self._lat)
+
+    @property
+    def cells(self) -> "numpy.ndarray":
+        """
+        Array of the (latitude, longitude) centres of the cells holding points.
+        """
+        return numpy.column_stack((self._cell_lat, self._cell_lng))
+
+    def distance_bounds(self, other, unit=Unit.KILOMETERS) -> Tuple["numpy.ndarray", "numpy.ndarray"]:
+        """
+        Bounds of the distances between the points of each cell of this grid and the points of
+        each cell of ``other``.
+
+        :param other: a ``HaversineGrid``
+        :param unit: unit of the returned distances
+        :return: a tuple ``(lower, upper)`` of arrays of shape ``(len(self.cells), len(other.cells))``.
+        """
+        kernel = _get_backend(None, 'HaversineGrid').haversine_kernel_vector
+        r = get_avg_earth_radius(unit)
+        angles = kernel(self._cell_lat[:, None], self._cell_lng[:, None], other._cell_lat, other._cell_lng)
+        radii = self._cell_radius[:, None] + other._cell_radius
+        return r * numpy.maximum(angles - radii, 0.0), r * numpy.minimum(angles + radii, pi)
+
+    def join(self, other, max_distance, unit=Unit.KILOMETERS, normalize=False, check=True,
+             max_memory=_DEFAULT_MAX_MEMORY) -> Tuple["numpy.ndarray", "numpy.ndarray"]:
+        """
+        Find the pairs of points of this grid and of ``other`` within ``max_distance`` of each other.
+
+        Pairs of cells accepted as a whole are not measured, so distances are not returned:
+        compute them with ``haversine_vector`` if needed.
+
+        :param other: a ``HaversineGrid``, or an array of (latitude, longitude) points in decimal
+                      degrees, bucketed in cells of the size of this grid.
+        :param max_distance: maximal distance of the returned pairs, in ``unit``
+        :param unit: unit of ``max_distance``
+        :param normalize: if True, normalize the points of ``other`` if it is an array.
+        :param check: if True, check that the points of ``other`` are normalized if it is an array.
+        :param max_memory: upper bound in bytes for the working memory (the result not included).
+        :return: a tuple ``(i, j)`` of arrays: the points ``i[k]`` of this grid and ``j[k]`` of
+                 ``other`` are within ``max_distance``, sorted by ``i`` then ``j``.
+        """
+        if not isinstance(other, HaversineGrid):
+            other = HaversineGrid(other, self.cell_size, normalize, check)
+        backend = _get_backend(None, 'HaversineGrid')
+        kernel = backend.haversine_kernel_vector
+        r = get_avg_earth_radius(unit)
+        max_angle = max_distance / r
+        if not len(self) or not len(other):
+            return numpy.empty(0, dtype=numpy.intp), numpy.empty(0, dtype=numpy.intp)
+
+        # Pairs of cells whose lower bound may be within max_distance, found among the cells
+        # as pairs_within finds points, and their angular distances.
+        cells1, cells2, angles = pairs_within(self.cells, other.cells,
+                                              max_angle + self._cell_radius.max() + other._cell_radius.max(),
+                                              Unit.RADIANS, check=False, max_memory=max_memory, backend=backend)
+        radii = self._cell_radius[cells1] + other._cell_radius[cells2]
+        near = angles - radii <= max_angle
+        cells1, cells2, angles, radii = cells1[near], cells2[near], angles[near], radii[near]
+        inside = angles + radii <= max_angle
+
+        # Pairs of cells within max_distance
+        found = [_cell_pairs_points(self._starts[cells1[inside]], self._counts[cells1[inside]],
+                                    other._starts[cells2[inside]], other._counts[cells2[inside]])]
+
+        # Pairs of cells partly within max_distance, measured by chunks fitting in the budget
+        cells1, cells2 = cells1[~inside], cells2[~inside]
+        budget = max(1, int(max_memory // _PAIRS_BYTES_PER_CANDIDATE))
+        ends = numpy.cumsum(self._counts[cells1] * other._counts[cells2])
+        start = 0
+        while start < len(cells1):
+            stop = max(int(numpy.searchsorted(ends, (ends[start - 1] if start else 0) + budget, side='right')),
+                       start + 1)
+            i, j = _cell_pairs_points(self._starts[cells1[start:stop]], self._counts[cells1[start:stop]],
+                                      other._starts[cells2[start:stop]], other._counts[cells2[start:stop]])
+            start = stop
+            hits = r * kernel(self._lat[i], self._lng[i], other._lat[j], other._lng[j]) <= max_distance
+            found.append((i[hits], j[hits]))
+
+        i, j = (numpy.concatenate([f[n] for f in found] + [numpy.empty(0, dtype=numpy.intp)]) for n in range(2))
+        # Sort the pairs by i then j, as a single key
+        pairs = self._order[i] * len(other) + other._order[j]
+        pairs.sort()
+        return numpy.divmod(pairs, len(other))
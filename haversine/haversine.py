@@ -1,7 +1,14 @@
 from enum import Enum
+from itertools import chain, islice
 from math import pi
-from typing import Union, Tuple
+from time import perf_counter
+from typing import Iterator, List, Union, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from types import SimpleNamespace
 import math
+import os
 
 
 # mean earth radius - https://en.wikipedia.org/wiki/Earth_radius#Mean_radius
@@ -43,6 +50,60 @@ class Direction(float, Enum):
     NORTHWEST = pi * 1.75
 
 
+class Precision(str, Enum):
+    """
+    Enumeration of the haversine kernels, trading speed for accuracy near antipodes:
+
+    - ``FAST``: ``2 * asin(sqrt(d))``, ``d`` being the haversine of the angle between the
+      points. It loses precision as ``d`` gets close to 1: up to about 20 cm for nearly
+      antipodal points.
+    - ``ACCURATE``: ``2 * atan2(sqrt(d), sqrt(1 - d))``, ``1 - d`` being computed from the
+      points rather than from ``d``: accurate to a few nanometres everywhere, about 1.3 times
+      slower in vector functions.
+    - ``HYBRID``: ``FAST``, except for the points more than about 168 degrees apart, which are
+      computed as with ``ACCURATE``: nearly as fast as ``FAST`` unless most points are nearly
+      antipodal, and accurate to a few tens of nanometres.
+    """
+
+    FAST = 'fast'
+    ACCURATE = 'accurate'
+    HYBRID = 'hybrid'
+
+
+# Working memory of the vector kernel, per computed distance: the numpy kernel keeps
+# up to 6 float64 temporaries of the block shape alive at once.
+_KERNEL_BYTES_PER_DISTANCE = 6 * 8
+
+# Default working memory for blocked computations, also used when writing to a memory-mapped array.
+_DEFAULT_MAX_MEMORY = 64 * 1024 ** 2
+
+# Default precision, looked up faster than Precision.FAST by scalar functions
+_FAST = Precision.FAST
+
+# Haversine of the angle between points above which the hybrid kernel switches to the
+# accurate formula: the error of the fast one stays below 3e-15 radians (20 nm) under it.
+_HYBRID_MIN_D = 0.99
+
+# Number of elements processed at once by chunked numpy operations, small enough for
+# their temporaries to stay in cache.
+_VECTOR_CHUNK_SIZE = 16 * 1024
+
+# Number of pairs from which haversine_many goes through numpy rather than a Python loop:
+# numpy gets faster from about 30 pairs with numba, 45 without.
+_MANY_VECTOR_MIN_SIZE = 32
+
+# Working memory of pairs_within, per candidate pair: the kernel's, plus its indices,
+# gathered coordinates and masks.
+_PAIRS_BYTES_PER_CANDIDATE = _KERNEL_BYTES_PER_DISTANCE + 8 * 8
+
+# Default number of pairs per chunk of haversine_stream.
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Number of distances under which computations stay on the calling thread, as
+# dispatching them to a thread pool would cost more than it saves.
+_PARALLEL_MIN_SIZE = 100_000
+
+
 # Unit values taken from http://www.unitconversion.org/unit_converter/length.html
 _CONVERSIONS = {
     Unit.KILOMETERS:       1.0,
@@ -72,17 +133,70 @@ def _normalize(lat: float, lon: float) -> Tuple[float, float]:
     return lat, lon
 
 
-def _normalize_vector(lat: "numpy.ndarray", lon: "numpy.ndarray") -> Tuple["numpy.ndarray", "numpy.ndarray"]:
+def _normalize_vector(lat: "numpy.ndarray", lon: "numpy.ndarray", inplace=False, backend=None) -> Tuple["numpy.ndarray", "numpy.ndarray"]:
     """
-    Normalize points to [-90, 90] latitude and [-180, 180] longitude.
+    Normalize points to [-90, 90] latitude and [-180, 180] longitude, with the given backend
+    (the current one if None). If inplace is True, the given (floating point) arrays are
+    overwritten with the result; it has no effect with ``array_api`` backends.
     """
-    lat = (lat + 90) % 360 - 90
-    lon = (lon + 180) % 360 - 180
-    wrap = lat > 90
-    if numpy.any(wrap):
-        lat[wrap] = 180 - lat[wrap]
-        lon[wrap] = lon[wrap] % 360 - 180
-    return lat, lon
+    recorder = _stats and _stats_call.get()
+    start = perf_counter() if recorder else 0.0
+    backend = backend or _get_backend()
+    if backend.array_api:
+        out_lat, out_lon = _normalize_vector_array_api(backend.xp, lat, lon)
+    elif inplace:
+        if not (numpy.issubdtype(lat.dtype, numpy.floating) and numpy.issubdtype(lon.dtype, numpy.floating)):
+            raise TypeError("In-place normalization requires floating point arrays")
+        out_lat, out_lon = lat, lon
+        backend.normalize_vector_into(lat, lon, out_lat, out_lon)
+    else:
+        out_lat = numpy.empty(lat.shape, dtype=numpy.result_type(lat, 0.0))
+        out_lon = numpy.empty(lon.shape, dtype=numpy.result_type(lon, 0.0))
+        backend.normalize_vector_into(lat, lon, out_lat, out_lon)
+    if recorder:
+        recorder.record_stage('normalize', start, lat.shape[0])
+    return out_lat, out_lon
+
+
+def _normalize_vector_chunks(lat: "numpy.ndarray", lon: "numpy.ndarray", out_lat: "numpy.ndarray", out_lon: "numpy.ndarray"):
+    """
+    Normalize points into out_lat/out_lon (which may be lat/lon themselves), by chunks small
+    enough for their temporaries to stay in cache.
+    """
+    if len(lat) <= _VECTOR_CHUNK_SIZE:
+        _normalize_vector_chunk(lat, lon, out_lat, out_lon)
+        return
+    for start in range(0, len(lat), _VECTOR_CHUNK_SIZE):
+        chunk = slice(start, start + _VECTOR_CHUNK_SIZE)
+        _normalize_vector_chunk(lat[chunk], lon[chunk], out_lat[chunk], out_lon[chunk])
+
+
+def _normalize_vector_chunk(lat: "numpy.ndarray", lon: "numpy.ndarray", out_lat: "numpy.ndarray", out_lon: "numpy.ndarray"):
+    # ufuncs are given their output positionally, which is faster to dispatch
+    numpy.add(lat, 90, out_lat)
+    numpy.remainder(out_lat, 360, out_lat)
+    numpy.subtract(out_lat, 90, out_lat)
+    numpy.add(lon, 180, out_lon)
+    numpy.remainder(out_lon, 360, out_lon)
+    numpy.subtract(out_lon, 180, out_lon)
+    wrap = out_lat > 90
+    if wrap.any():
+        out_lat[wrap] = 180 - out_lat[wrap]
+        out_lon[wrap] = out_lon[wrap] % 360 - 180
+
+
+def _normalize_vector_loop(lat: "numpy.ndarray", lon: "numpy.ndarray", out_lat: "numpy.ndarray", out_lon: "numpy.ndarray"):
+    """
+    Same as _normalize_vector_chunks, in a single pass (to be compiled with numba).
+    """
+    for i in range(lat.shape[0]):
+        lat_i = (lat[i] + 90) % 360 - 90
+        lon_i = (lon[i] + 180) % 360 - 180
+        if lat_i > 90:
+            lat_i = 180 - lat_i
+            lon_i = lon_i % 360 - 180
+        out_lat[i] = lat_i
+        out_lon[i] = lon_i
 
 
 def _ensure_lat_lon(lat: float, lon: float):
@@ -95,16 +209,52 @@ def _ensure_lat_lon(lat: float, lon: float):
         raise ValueError(f"Longitude {lon} is out of range [-180, 180]")
 
 
-def _ensure_lat_lon_vector(lat: "numpy.ndarray", lon: "numpy.ndarray"):
+def _ensure_lat_lon_vector(lat: "numpy.ndarray", lon: "numpy.ndarray", backend=None):
     """
     Ensure that the given latitude and longitude have proper values. An exception is raised if they are not.
     """
-    if numpy.abs(lat).max() > 90:
+    recorder = _stats and _stats_call.get()
+    start = perf_counter() if recorder else 0.0
+    out_of_range = (backend or _get_backend()).lat_lon_out_of_range(lat, lon)
+    if recorder:
+        recorder.record_stage('check', start, lat.shape[0])
+    if out_of_range == 1:
         raise ValueError("Latitude(s) out of range [-90, 90]")
-    if numpy.abs(lon).max() > 180:
+    if out_of_range == 2:
         raise ValueError("Longitude(s) out of range [-180, 180]")
 
 
+def _lat_lon_out_of_range_chunks(lat: "numpy.ndarray", lon: "numpy.ndarray") -> int:
+    """
+    Return 1 if a latitude is out of [-90, 90], 2 if a longitude is out of [-180, 180], 0 otherwise.
+    Large arrays are scanned by chunks, so that only a chunk-sized temporary is needed.
+    """
+    if not len(lat):
+        return 0
+    if len(lat) <= _VECTOR_CHUNK_SIZE:
+        return 1 if numpy.abs(lat).max() > 90 else 2 if numpy.abs(lon).max() > 180 else 0
+    buffer = numpy.empty(_VECTOR_CHUNK_SIZE, dtype=numpy.result_type(lat, lon))
+    for values, limit, code in ((lat, 90, 1), (lon, 180, 2)):
+        for start in range(0, len(values), _VECTOR_CHUNK_SIZE):
+            chunk = values[start:start + _VECTOR_CHUNK_SIZE]
+            if numpy.abs(chunk, out=buffer[:len(chunk)]).max() > limit:
+                return code
+    return 0
+
+
+def _lat_lon_out_of_range_loop(lat: "numpy.ndarray", lon: "numpy.ndarray") -> int:
+    """
+    Same as _lat_lon_out_of_range_chunks, in a single pass (to be compiled with numba).
+    """
+    lon_out_of_range = False
+    for i in range(lat.shape[0]):
+        if lat[i] < -90 or lat[i] > 90:
+            return 1
+        if lon[i] < -180 or lon[i] > 180:
+            lon_out_of_range = True
+    return 2 if lon_out_of_range else 0
+
+
 def _explode_args(f):
     return lambda ops: f(**ops.__dict__)
 
@@ -132,6 +282,112 @@ def _create_haversine_kernel(*, asin=None, arcsin=None, cos, radians, sin, sqrt,
     return _haversine_kernel
 
 
+@_explode_args
+def _create_prepared_haversine_kernel(*, asin=None, arcsin=None, sin, sqrt, **_):
+    asin = asin or arcsin
+
+    def _prepared_haversine_kernel(lat1, lng1, cos_lat1, lat2, lng2, cos_lat2):
+        """
+        Compute the haversine distance on unit sphere, from points prepared as by
+        ``PreparedPoints``: lat/lng in radians along with the cosine of the latitude.
+        """
+        lat = lat2 - lat1
+        lng = lng2 - lng1
+        d = (sin(lat * 0.5) ** 2
+             + cos_lat1 * cos_lat2 * sin(lng * 0.5) ** 2)
+        return 2 * asin(sqrt(d))
+    return _prepared_haversine_kernel
+
+
+@_explode_args
+def _create_accurate_haversine_kernel(*, atan2=None, arctan2=None, cos, radians, sin, sqrt, **_):
+    atan2 = atan2 or arctan2
+
+    def _accurate_haversine_kernel(lat1, lng1, lat2, lng2):
+        """
+        Same as _haversine_kernel, with atan2. 1 - d is computed as the haversine of the
+        angle to the antipode of point 2, as it would lose all its precision near antipodes
+        if computed from d.
+        """
+        lat1 = radians(lat1)
+        lng1 = radians(lng1)
+        lat2 = radians(lat2)
+        lng2 = radians(lng2)
+        lng = lng2 - lng1
+        cos_lats = cos(lat1) * cos(lat2)
+        d = (sin((lat2 - lat1) * 0.5) ** 2
+             + cos_lats * sin(lng * 0.5) ** 2)
+        d_antipode = (sin((lat1 + lat2) * 0.5) ** 2
+                      + cos_lats * cos(lng * 0.5) ** 2)
+        return 2 * atan2(sqrt(d), sqrt(d_antipode))
+    return _accurate_haversine_kernel
+
+
+@_explode_args
+def _create_hybrid_haversine_kernel(*, asin=None, arcsin=None, atan2=None, arctan2=None, cos, radians, sin, sqrt,
+                                    **_):
+    asin = asin or arcsin
+    atan2 = atan2 or arctan2
+    min_d = _HYBRID_MIN_D
+
+    def _hybrid_haversine_kernel(lat1, lng1, lat2, lng2):
+        """
+        Same as _haversine_kernel, with the formula of _accurate_haversine_kernel when d is
+        close to 1. Inputs are scalars (with ops==math, or compiled with numba.vectorize).
+        """
+        lat1 = radians(lat1)
+        lng1 = radians(lng1)
+        lat2 = radians(lat2)
+        lng2 = radians(lng2)
+        lng = lng2 - lng1
+        cos_lats = cos(lat1) * cos(lat2)
+        d = (sin((lat2 - lat1) * 0.5) ** 2
+             + cos_lats * sin(lng * 0.5) ** 2)
+        if d > min_d:
+            d_antipode = (sin((lat1 + lat2) * 0.5) ** 2
+                          + cos_lats * cos(lng * 0.5) ** 2)
+            return 2 * atan2(sqrt(d), sqrt(d_antipode))
+        return 2 * asin(sqrt(d))
+    return _hybrid_haversine_kernel
+
+
+def _hybrid_haversine_kernel_numpy(lat1, lng1, lat2, lng2):
+    """
+    Same as _hybrid_haversine_kernel with numpy arrays: the accurate formula is only
+    computed for the elements where d is close to 1.
+    """
+    lat1 = numpy.radians(lat1)
+    lng1 = numpy.radians(lng1)
+    lat2 = numpy.radians(lat2)
+    lng2 = numpy.radians(lng2)
+    lng = lng2 - lng1
+    cos_lats = numpy.cos(lat1) * numpy.cos(lat2)
+    d = (numpy.sin((lat2 - lat1) * 0.5) ** 2
+         + cos_lats * numpy.sin(lng * 0.5) ** 2)
+    distance = 2 * numpy.arcsin(numpy.sqrt(d))
+    far = d > _HYBRID_MIN_D
+    if far.any():
+        shape = distance.shape
+        lat_sum = numpy.broadcast_to(lat1 + lat2, shape)[far]
+        d_antipode = (numpy.sin(lat_sum * 0.5) ** 2
+                      + numpy.broadcast_to(cos_lats, shape)[far] * numpy.cos(numpy.broadcast_to(lng, shape)[far] * 0.5) ** 2)
+        distance[far] = 2 * numpy.arctan2(numpy.sqrt(d[far]), numpy.sqrt(d_antipode))
+    return distance
+
+
+def _create_hybrid_haversine_kernel_array_api(xp, ops):
+    """
+    Same as _hybrid_haversine_kernel_numpy, for array modules whose arrays may not support
+    assignment: both formulas are computed for all the elements.
+    """
+    fast, accurate = _create_haversine_kernel(ops), _create_accurate_haversine_kernel(ops)
+
+    def _hybrid_haversine_kernel(lat1, lng1, lat2, lng2):
+        distance = fast(lat1, lng1, lat2, lng2)
+        # d > _HYBRID_MIN_D, from the distance
+        return xp.where(distance > 2 * math.asin(math.sqrt(_HYBRID_MIN_D)), accurate(lat1, lng1, lat2, lng2), distance)
+    return _hybrid_haversine_kernel
+
 
 @_explode_args
 def _create_inverse_haversine_kernel(*, asin=None, arcsin=None, atan2=None, arctan2=None, cos, degrees, radians, sin, sqrt, **_):
@@ -156,31 +412,546 @@ def _create_inverse_haversine_kernel(*, asin=None, arcsin=None, atan2=None, arct
     return _inverse_haversine_kernel
 
 
+def _haversine_pairs_numpy(kernel, lat1: "numpy.ndarray", lng1: "numpy.ndarray", lat2: "numpy.ndarray", lng2: "numpy.ndarray",
+                           out: "numpy.ndarray"):
+    """
+    Write into out the distances, on unit sphere, between the points of each pair, computed
+    one pair at a time with the scalar ``kernel``: the same floats as the ones of haversine.
+    """
+    out[...] = list(map(kernel, lat1.tolist(), lng1.tolist(), lat2.tolist(), lng2.tolist()))
+
+
+def _haversine_pairs_loop(lat1: "numpy.ndarray", lng1: "numpy.ndarray", lat2: "numpy.ndarray", lng2: "numpy.ndarray",
+                          out: "numpy.ndarray"):
+    """
+    Same as _haversine_pairs_numpy (to be compiled with numba).
+    """
+    for i in range(lat1.shape[0]):
+        out[i] = _haversine_kernel_numba(lat1[i], lng1[i], lat2[i], lng2[i])
+
+
+def _cumulative_distance_numpy(kernel, lat: "numpy.ndarray", lng: "numpy.ndarray", out: "numpy.ndarray"):
+    """
+    Write into out the cumulative distance along the path going through the given points,
+    on unit sphere, computed with the vector ``kernel``.
+    """
+    out[:1] = 0
+    numpy.cumsum(kernel(lat[:-1], lng[:-1], lat[1:], lng[1:]), out=out[1:])
+
+
+def _cumulative_distance_loop(lat: "numpy.ndarray", lng: "numpy.ndarray", out: "numpy.ndarray"):
+    """
+    Same as _cumulative_distance_numpy, in a single pass (to be compiled with numba).
+    """
+    total = 0.0
+    for i in range(lat.shape[0]):
+        if i > 0:
+            total += _haversine_kernel_numba(lat[i - 1], lng[i - 1], lat[i], lng[i])
+        out[i] = total
+
+
+def _path_lengths_numpy(kernel, lat: "numpy.ndarray", lng: "numpy.ndarray", offsets: "numpy.ndarray", out: "numpy.ndarray"):
+    """
+    Write into out the length, on unit sphere, of each path going through the points
+    offsets[i]:offsets[i + 1], computed with the vector ``kernel``.
+    """
+    cumulative = numpy.empty(len(lat))
+    _cumulative_distance_numpy(kernel, lat, lng, cumulative)
+    starts, ends = offsets[:-1], offsets[1:]
+    not_empty = ends > starts
+    out[:] = 0
+    out[not_empty] = cumulative[ends[not_empty] - 1] - cumulative[starts[not_empty]]
+
+
+def _path_lengths_loop(lat: "numpy.ndarray", lng: "numpy.ndarray", offsets: "numpy.ndarray", out: "numpy.ndarray"):
+    """
+    Same as _path_lengths_numpy, in a single pass (to be compiled with numba).
+    """
+    for path in range(offsets.shape[0] - 1):
+        total = 0.0
+        for i in range(offsets[path] + 1, offsets[path + 1]):
+            total += _haversine_kernel_numba(lat[i - 1], lng[i - 1], lat[i], lng[i])
+        out[path] = total
+
+
+def _inverse_haversine_numpy(kernel, lat, lng, direction, distance, r, out_lat, out_lng):
+    """
+    Write into out_lat and out_lng the points at distance (on a sphere of radius r) of the
+    given points in direction, computed with the vector ``kernel``.
+    """
+    out_lat[...], out_lng[...] = kernel(lat, lng, direction, distance / r)
+
+
+def _inverse_haversine_loop(lat, lng, direction, distance, r, out_lat, out_lng):
+    """
+    Same as _inverse_haversine_numpy, without any temporary array (to be compiled with numba).
+    """
+    for i in range(lat.shape[0]):
+        out_lat[i], out_lng[i] = _inverse_haversine_kernel_numba(lat[i], lng[i], direction[i], distance[i] / r)
+
+
+def _normalize_vector_array_api(xp, lat, lon):
+    """
+    Same as _normalize_vector_chunks, returning new arrays of the array module xp, whose
+    arrays may not support assignment.
+    """
+    lat = (lat + 90) % 360 - 90
+    lon = (lon + 180) % 360 - 180
+    wrap = lat > 90
+    return xp.where(wrap, 180 - lat, lat), xp.where(wrap, lon % 360 - 180, lon)
+
+
+def _lat_lon_out_of_range_array_api(xp, lat, lon) -> int:
+    """
+    Same as _lat_lon_out_of_range_chunks, with arrays of the array module xp.
+    """
+    if xp.any(xp.abs(lat) > 90):
+        return 1
+    if xp.any(xp.abs(lon) > 180):
+        return 2
+    return 0
+
+
+def _array_api_ops(xp):
+    """
+    Operations expected by the kernel factories, taken from the array module xp. Those
+    missing from the array API standard (radians and degrees) are derived from others.
+    """
+    ops = dict(vars(xp))
+    ops.setdefault('radians', lambda x: x * (pi / 180))
+    ops.setdefault('degrees', lambda x: x * (180 / pi))
+    return SimpleNamespace(**ops)
+
+
 _haversine_kernel = _create_haversine_kernel(math)
 _inverse_haversine_kernel = _create_inverse_haversine_kernel(math)
 
-try:
+# Scalar kernels of the other precisions, plain Python ones whatever the backend.
+_PRECISE_HAVERSINE_KERNELS = {
+    Precision.ACCURATE: _create_accurate_haversine_kernel(math),
+    Precision.HYBRID: _create_hybrid_haversine_kernel(math),
+}
+
+
+class _Backend:
+    """
+    Kernels of the vector functions for an array module ``xp``: numpy, or any array-API
+    compatible library (``array_api`` backends). The latter only have the kernels needed
+    by ``haversine_vector`` and ``inverse_haversine_vector``, other ones being None.
+    Scalar kernels are the ones scalar functions use when the backend is set with ``set_backend``.
+    With ``ufunc_kernels``, the vector kernels of haversine are ufuncs, accepting an ``out`` array.
+    """
+
+    __slots__ = ('name', 'xp', 'array_api', 'haversine_kernel', 'inverse_haversine_kernel',
+                 'haversine_kernel_vector', 'prepared_haversine_kernel_vector', 'inverse_haversine_kernel_vector',
+                 'normalize_vector_into', 'lat_lon_out_of_range', 'cumulative_distance_into', 'path_lengths_into',
+                 'inverse_haversine_into', 'ufunc_kernels', 'accurate_haversine_kernel_vector',
+                 'hybrid_haversine_kernel_vector', 'haversine_pairs_into')
+
+    def __init__(self, name, xp, array_api=False, **kernels):
+        self.name = name
+        self.xp = xp
+        self.array_api = array_api
+        for attribute in self.__slots__[3:]:
+            setattr(self, attribute, kernels.get(attribute))
+
+
+def _create_numpy_backend():
     import numpy
-    has_numpy = True
-    _haversine_kernel_vector = _create_haversine_kernel(numpy)
-    _inverse_haversine_kernel_vector = _create_inverse_haversine_kernel(numpy)
-except ModuleNotFoundError:
-    # Import error will be reported in haversine_vector() / inverse_haversine_vector()
-    has_numpy = False
-
-try:
+    haversine_kernel = _create_haversine_kernel(math)
+    haversine_kernel_vector = _create_haversine_kernel(numpy)
+    inverse_haversine_kernel_vector = _create_inverse_haversine_kernel(numpy)
+    return _Backend(
+        'numpy', numpy,
+        haversine_kernel=haversine_kernel,
+        inverse_haversine_kernel=_create_inverse_haversine_kernel(math),
+        haversine_kernel_vector=haversine_kernel_vector,
+        prepared_haversine_kernel_vector=_create_prepared_haversine_kernel(numpy),
+        inverse_haversine_kernel_vector=inverse_haversine_kernel_vector,
+        normalize_vector_into=_normalize_vector_chunks,
+        lat_lon_out_of_range=_lat_lon_out_of_range_chunks,
+        cumulative_distance_into=partial(_cumulative_distance_numpy, haversine_kernel_vector),
+        path_lengths_into=partial(_path_lengths_numpy, haversine_kernel_vector),
+        inverse_haversine_into=partial(_inverse_haversine_numpy, inverse_haversine_kernel_vector),
+        accurate_haversine_kernel_vector=_create_accurate_haversine_kernel(numpy),
+        hybrid_haversine_kernel_vector=_hybrid_haversine_kernel_numpy,
+        haversine_pairs_into=partial(_haversine_pairs_numpy, haversine_kernel),
+    )
+
+
+def _create_numba_backend():
     import numba # type: ignore
-    if has_numpy:
-        _haversine_kernel_vector = numba.vectorize(fastmath=True)(_haversine_kernel_vector)
+    import numpy
+    global _haversine_kernel_numba, _inverse_haversine_kernel_numba
+
+    # Compiled kernels are cached on disk (cache=True), so that only the first process
+    # using them pays for their compilation.
+    # The loops call these ones, which numba needs as globals; the inverse one is compiled
+    # with fastmath, as the vector kernels.
+    _haversine_kernel_numba = numba.njit(cache=True)(_create_haversine_kernel(math))
+    _inverse_haversine_kernel_numba = numba.njit(fastmath=True, cache=True)(_create_inverse_haversine_kernel(math))
+    return _Backend(
+        'numba', numpy,
+        haversine_kernel=_haversine_kernel_numba,
+        inverse_haversine_kernel=numba.njit(cache=True)(_create_inverse_haversine_kernel(math)),
+        # Explicit signatures compile the ufuncs when loaded, instead of on their first
+        # call; other input types are cast to one of them by numpy.
+        haversine_kernel_vector=numba.vectorize(
+            _VECTORIZE_SIGNATURES[4], fastmath=True, cache=True)(_create_haversine_kernel(numpy)),
+        prepared_haversine_kernel_vector=numba.vectorize(
+            _VECTORIZE_SIGNATURES[6], fastmath=True, cache=True)(_create_prepared_haversine_kernel(numpy)),
         # Tuple output is not supported for numba.vectorize. Just jit the numpy version.
-        _inverse_haversine_kernel_vector = numba.njit(fastmath=True)(_inverse_haversine_kernel_vector)
-    _haversine_kernel = numba.njit(_haversine_kernel)
-    _inverse_haversine_kernel = numba.njit(_inverse_haversine_kernel)
-except ModuleNotFoundError:
-    pass
+        # nogil allows inverse_haversine_vector to run it on several threads.
+        inverse_haversine_kernel_vector=numba.njit(
+            fastmath=True, nogil=True, cache=True)(_create_inverse_haversine_kernel(numpy)),
+        normalize_vector_into=numba.njit(nogil=True, cache=True)(_normalize_vector_loop),
+        lat_lon_out_of_range=numba.njit(nogil=True, cache=True)(_lat_lon_out_of_range_loop),
+        cumulative_distance_into=numba.njit(nogil=True, cache=True)(_cumulative_distance_loop),
+        path_lengths_into=numba.njit(nogil=True, cache=True)(_path_lengths_loop),
+        inverse_haversine_into=numba.njit(fastmath=True, nogil=True, cache=True)(_inverse_haversine_loop),
+        ufunc_kernels=True,
+        accurate_haversine_kernel_vector=numba.vectorize(
+            _VECTORIZE_SIGNATURES[4], fastmath=True, cache=True)(_create_accurate_haversine_kernel(numpy)),
+        hybrid_haversine_kernel_vector=numba.vectorize(
+            _VECTORIZE_SIGNATURES[4], fastmath=True, cache=True)(_create_hybrid_haversine_kernel(numpy)),
+        haversine_pairs_into=numba.njit(nogil=True, cache=True)(_haversine_pairs_loop),
+    )
+
+
+def _create_array_api_backend(name, xp):
+    ops = _array_api_ops(xp)
+    return _Backend(
+        name, xp, array_api=True,
+        haversine_kernel=_create_haversine_kernel(math),
+        inverse_haversine_kernel=_create_inverse_haversine_kernel(math),
+        haversine_kernel_vector=_create_haversine_kernel(ops),
+        inverse_haversine_kernel_vector=_create_inverse_haversine_kernel(ops),
+        lat_lon_out_of_range=partial(_lat_lon_out_of_range_array_api, xp),
+        accurate_haversine_kernel_vector=_create_accurate_haversine_kernel(ops),
+        hybrid_haversine_kernel_vector=_create_hybrid_haversine_kernel_array_api(xp, ops),
+    )
+
+
+# Factories of the backends by name, and the backends they created. Backends are only
+# created on first use, as importing numpy (and compiling kernels with numba) takes much
+# longer than importing this module; scalar functions never need them.
+_BACKEND_FACTORIES = {'numpy': _create_numpy_backend, 'numba': _create_numba_backend}
+_backends = {}
+
+# Backend of vector functions when none is given: the one of use_backend, else the one of
+# set_backend, else numba if installed, numpy otherwise.
+_context_backend = ContextVar('haversine_backend', default=None)
+_default_backend = None
+_automatic_backend = None
+
+_vector_backend_loaded = False
+_VECTOR_BACKEND_NAMES = frozenset(('numpy', 'has_numpy'))
+
+
+def _load_vector_backend():
+    """
+    Import numpy, and create the automatic backend with it. Scalar functions use its
+    kernels as well (i.e. numba-compiled ones when numba is installed), unless another
+    backend was set with set_backend.
+    """
+    global _vector_backend_loaded, numpy, has_numpy, _automatic_backend
+
+    try:
+        import numpy
+        has_numpy = True
+    except ModuleNotFoundError:
+        # Import error will be reported in haversine_vector() / inverse_haversine_vector()
+        has_numpy = False
+    else:
+        try:
+            _automatic_backend = _lookup_backend('numba')
+        except ModuleNotFoundError:
+            _automatic_backend = _lookup_backend('numpy')
+        if _default_backend is None:
+            _use_scalar_kernels(_automatic_backend)
+
+    _vector_backend_loaded = True
+
+
+def _lookup_backend(backend) -> _Backend:
+    """
+    Return the backend of the given name, or array module, creating it if needed.
+    """
+    name = backend if isinstance(backend, str) else backend.__name__
+    if name not in _backends:
+        if name not in _BACKEND_FACTORIES:
+            if isinstance(backend, str):
+                raise ValueError(f"Unknown backend {name!r}, expected one of {', '.join(map(repr, _BACKEND_FACTORIES))}")
+            register_backend(name, backend)
+        _backends[name] = _BACKEND_FACTORIES[name]()
+    return _backends[name]
+
+
+def _get_backend(backend=None, function='haversine_vector', alternative='haversine', array_api=False) -> _Backend:
+    """
+    Return the backend to use for a call to ``function``: the given one, or the current one if None.
+    An error is raised if numpy is not installed, or if the backend is an ``array_api`` one
+    and ``function`` does not support them.
+    """
+    _require_numpy(function, alternative)
+    if backend is None:
+        backend = _context_backend.get() or _default_backend or _automatic_backend
+    elif not isinstance(backend, _Backend):
+        backend = _lookup_backend(backend)
+    if backend.array_api and not array_api:
+        raise ValueError(f"{function} requires a numpy based backend, not {backend.name!r}")
+    return backend
 
 
-def haversine(point1, point2, unit=Unit.KILOMETERS, normalize=False, check=True):
+def _check_array_api_options(backend, **options):
+    """
+    Raise an error if the given options, which only numpy based backends support, are set for an ``array_api`` backend.
+    """
+    if backend.array_api:
+        unsupported = [name for name, value in options.items() if value not in (None, False)]
+        if unsupported:
+            raise ValueError(f"{', '.join(unsupported)} not supported by the {backend.name!r} backend")
+
+
+def _use_scalar_kernels(backend):
+    global _haversine_kernel, _inverse_haversine_kernel
+    _haversine_kernel = backend.haversine_kernel
+    _inverse_haversine_kernel = backend.inverse_haversine_kernel
+
+
+def register_backend(name, module):
+    """
+    Register an array module as a backend, e.g. an array-API compatible library such as
+    CuPy or ``array_api_strict``. Operations missing from the array API standard
+    (radians and degrees) are derived from others.
+
+    The arrays of such backends are supported by ``haversine_vector``, ``haversine_vector_columns``
+    and ``inverse_haversine_vector``, without the options specific to numpy (``out``,
+    ``max_memory``, ``workers``, ``inplace``). Other vector functions require a numpy based backend.
+
+    :param name: name of the backend, for ``set_backend``, ``use_backend`` and ``backend=`` parameters.
+    :param module: the array module, or array API namespace.
+    """
+    if name in ('numpy', 'numba'):
+        raise ValueError(f"Backend {name!r} is built in and cannot be replaced")
+    _BACKEND_FACTORIES[name] = partial(_create_array_api_backend, name, module)
+    _backends.pop(name, None)
+
+
+def set_backend(backend):
+    """
+    Set the backend used by vector functions when not given one, for the whole process:
+
+    - ``'numba'``: numba-compiled kernels (requires numba),
+    - ``'numpy'``: numpy kernels,
+    - the name given to ``register_backend``, or an array module.
+
+    ``None`` restores the default, which is numba when it is installed and numpy otherwise.
+
+    Scalar functions (``haversine``, ``inverse_haversine``...) use the scalar kernels of this
+    backend as well: numba-compiled ones with numba, plain Python ones otherwise.
+    """
+    global _default_backend
+    _default_backend = None if backend is None else _get_backend(backend, 'set_backend', array_api=True)
+    if _default_backend is not None:
+        _use_scalar_kernels(_default_backend)
+    elif _automatic_backend is not None:
+        _use_scalar_kernels(_automatic_backend)
+
+
+def get_backend() -> str:
+    """
+    Return the name of the backend vector functions use when not given one.
+    """
+    return _get_backend(None, 'get_backend', array_api=True).name
+
+
+@contextmanager
+def use_backend(backend):
+    """
+    Context manager setting the backend used by vector functions when not given one, within
+    its block (see ``set_backend``). It applies to the current thread or asyncio task only,
+    and leaves the kernels of scalar functions unchanged.
+
+    Example::
+
+        with use_backend('numpy'):
+            distances = haversine_vector(array1, array2)
+    """
+    token = _context_backend.set(_get_backend(backend, 'use_backend', array_api=True))
+    try:
+        yield
+    finally:
+        _context_backend.reset(token)
+
+
+class _Stats:
+    """
+    Counters of the instrumented vector functions, and of the stages of their computation.
+    """
+
+    def __init__(self):
+        # Instrumented functions may be called from several threads
+        from threading import Lock
+        self._lock = Lock()
+        self._counters = {'functions': {}, 'stages': {}}
+
+    def reset(self):
+        with self._lock:
+            self._counters = {'functions': {}, 'stages': {}}
+
+    def record_call(self, function, start, elements):
+        self._record('functions', function, start, elements)
+
+    def record_stage(self, stage, start, elements):
+        self._record('stages', stage, start, elements)
+
+    def _record(self, kind, name, start, elements):
+        seconds = perf_counter() - start
+        with self._lock:
+            entries = self._counters[kind]
+            counters = entries.get(name)
+            if counters is None:
+                counters = entries[name] = {'calls': 0, 'elements': 0, 'seconds': 0.0}
+            counters['calls'] += 1
+            counters['elements'] += elements
+            counters['seconds'] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {kind: {name: dict(counters) for name, counters in entries.items()}
+                    for kind, entries in self._counters.items()}
+
+
+# Counters of stats(), created when first enabled, and the ones instrumented code records
+# to: None when disabled, so that it only pays for a global lookup.
+_stats_counters = None
+_stats = None
+
+# Recorder of the instrumented call in progress, if any. Stages are only recorded within
+# instrumented calls, so that the stages of other callers (e.g. pairs_within) do not
+# inflate them.
+_stats_call = ContextVar('haversine_stats_call', default=None)
+
+
+def enable_stats():
+    """
+    Start recording, for ``stats()``, the calls to vector functions (``haversine_vector``,
+    ``haversine_vector_columns``, ``haversine_pdist`` and ``inverse_haversine_vector``) and
+    the time spent in the stages of their computation. Counters recorded so far are kept.
+    """
+    global _stats, _stats_counters
+    if _stats_counters is None:
+        _stats_counters = _Stats()
+    _stats = _stats_counters
+
+
+def disable_stats():
+    """
+    Stop recording stats. Counters recorded so far are kept.
+    """
+    global _stats
+    _stats = None
+
+
+def reset_stats():
+    """
+    Reset the counters of ``stats()`` to zero.
+    """
+    if _stats_counters is not None:
+        _stats_counters.reset()
+
+
+def stats() -> dict:
+    """
+    Return the counters recorded since ``enable_stats()`` (or the last ``reset_stats()``):
+
+    - ``'functions'``: for each instrumented function, its number of calls, of computed
+      elements (distances, or destinations) and the time spent in it, in seconds,
+    - ``'stages'``: the same for each stage of the computations of instrumented functions
+      (other functions, e.g. ``pairs_within``, are not recorded): ``'convert'`` (conversion
+      of inputs to arrays), ``'check'`` (range checks), ``'normalize'`` and ``'kernel'``
+      (trigonometry and conversion to the requested unit). Elements are points, or
+      computed elements for ``'kernel'``.
+
+    Example::
+
+        haversine.enable_stats()
+        ...
+        print(haversine.stats()['stages']['kernel'])
+        >> {'calls': 1203, 'elements': 93810241, 'seconds': 1.93}
+
+    Recording costs a few microseconds per call, which matters for small arrays only; disabled,
+    it costs nothing measurable.
+    """
+    if _stats_counters is None:
+        return {'functions': {}, 'stages': {}}
+    return _stats_counters.snapshot()
+
+
+# Signatures of the numba ufuncs, by number of arguments: single and double precision.
+_VECTORIZE_SIGNATURES = {
+    n: [f"{t}({', '.join([t] * n)})" for t in ('float32', 'float64')] for n in (4, 6)
+}
+
+
+def warmup():
+    """
+    Load numpy and numba, and compile the kernels for the common types of inputs, so that
+    the first calls to vector functions are not slowed down by it; e.g. at deploy time, or
+    when starting a worker process before it serves requests.
+
+    With numba, compiled kernels are cached on disk: once they have been compiled by a
+    process, others load them instead of compiling them again.
+    """
+    haversine((0, 0), (0, 0))
+    haversine((0.0, 0.0), (0.0, 0.0))
+    inverse_haversine((0.0, 0.0), 0.0, 0.0)
+    if not _numpy_available():
+        return
+
+    for dtype in (numpy.float64, numpy.float32):
+        points = numpy.zeros((2, 2), dtype=dtype)
+        lat, lng = numpy.zeros(2, dtype=dtype), numpy.zeros(2, dtype=dtype)
+        haversine_vector(points, points, dtype=dtype)
+        haversine_vector(points, points, normalize=True, dtype=dtype)
+        haversine_vector_columns(lat, lng, lat, lng, dtype=dtype)
+        haversine_vector_columns(lat, lng, lat, lng, normalize=True, dtype=dtype)
+        haversine_vector(PreparedPoints(points), PreparedPoints(points), comb=True)
+        path_lengths(points, [0, 2])
+        cumulative_distance(points)
+        inverse_haversine_vector(points, lat, lng, normalize_output=True)
+        inverse_haversine_vector(points, lat, lng, comb=True)
+
+
+def _numpy_available():
+    """
+    Load the vector backend if needed, and tell whether numpy is installed.
+    """
+    if not _vector_backend_loaded:
+        _load_vector_backend()
+    return has_numpy
+
+
+def _require_numpy(function, alternative):
+    """
+    Load the vector backend if needed, and raise an error if numpy is not installed.
+    """
+    if not _numpy_available():
+        raise RuntimeError('Error, unable to import Numpy, '
+                           f'consider using {alternative} instead of {function}.')
+
+
+def __getattr__(name):
+    # Give access to the lazily loaded names, e.g. haversine.haversine.has_numpy
+    if name in _VECTOR_BACKEND_NAMES:
+        _load_vector_backend()
+        if name in globals():
+            return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def haversine(point1, point2, unit=Unit.KILOMETERS, normalize=False, check=True, precision=Precision.FAST):
     """ Calculate the great-circle distance between two points on the Earth surface.
 
     Takes two 2-tuples, containing the latitude and longitude of each point in decimal degrees,
@@ -193,6 +964,9 @@ def haversine(point1, point2, unit=Unit.KILOMETERS, normalize=False, check=True)
                  default 'km' (kilometers).
     :param normalize: if True, normalize the points to [-90, 90] latitude and [-180, 180] longitude.
     :param check: if True, check that points are normalized.
+    :param precision: a member of haversine.Precision, or its value (e.g. 'accurate'): the
+                      kernel of the computation, more accurate near antipodes but slower than
+                      the default one.
 
     Example: ``haversine((45.7597, 4.8422), (48.8567, 2.3508), unit=Unit.METERS)``
 
@@ -218,32 +992,450 @@ def haversine(point1, point2, unit=Unit.KILOMETERS, normalize=False, check=True)
         _ensure_lat_lon(lat1, lng1)
         _ensure_lat_lon(lat2, lng2)
 
+    if precision is not _FAST:
+        return get_avg_earth_radius(unit) * _scalar_haversine_kernel(precision)(lat1, lng1, lat2, lng2)
     return get_avg_earth_radius(unit) * _haversine_kernel(lat1, lng1, lat2, lng2)
 
 
-def haversine_vector(array1, array2, unit=Unit.KILOMETERS, comb=False, normalize=False, check=True):
+def _scalar_haversine_kernel(precision):
+    """
+    Return the scalar kernel of haversine of the given precision.
+    """
+    precision = Precision(precision)
+    return _haversine_kernel if precision is Precision.FAST else _PRECISE_HAVERSINE_KERNELS[precision]
+
+
+def haversine_many(pairs, unit=Unit.KILOMETERS, normalize=False, check=True, backend=None) -> List[float]:
+    """ Calculate the great-circle distance of each pair of points of an iterable.
+
+    Meant for batches of pairs of tuples, as built by plain Python code: for those, the cost of
+    converting them to numpy arrays outweighs the gain of ``haversine_vector`` on small batches,
+    while calling ``haversine`` in a loop repeats work on each call. Small batches are computed
+    in a Python loop, larger ones with numpy (when installed).
+
+    :param pairs: iterable of (point1, point2) pairs, each point being a tuple of (latitude, longitude)
+    :param unit: the unit of the returned distances, see ``haversine``.
+    :param normalize: if True, normalize the points to [-90, 90] latitude and [-180, 180] longitude.
+    :param check: if True, check that points are normalized.
+    :param backend: backend of the computation, see ``set_backend``; the current one if None,
+                    or numba/numpy if the current one is an array-API backend.
+
+    Example: ``haversine_many([(lyon, paris), (lyon, new_york)], unit=Unit.MILES)``
+
+    :return: the list of distances between the points of each pair.
+    """
+    if not isinstance(pairs, (list, tuple)):
+        pairs = list(pairs)
+    r = get_avg_earth_radius(unit)
+
+    if len(pairs) >= _MANY_VECTOR_MIN_SIZE and _numpy_available():
+        backend = _get_backend(backend, 'haversine_many', array_api=backend is None)
+        if backend.array_api:
+            # Pairs are converted to numpy arrays: when an array-API backend is the current one,
+            # compute them with the automatic backend, as the loop does with plain Python kernels
+            backend = _automatic_backend
+        coordinates = _pairs_coordinates(pairs)
+        lat1, lng1 = _normalize_or_check_vector(coordinates[:, 0], coordinates[:, 1], normalize, check, backend=backend)
+        lat2, lng2 = _normalize_or_check_vector(coordinates[:, 2], coordinates[:, 3], normalize, check, backend=backend)
+        return _scaled(r, backend.haversine_kernel_vector(lat1, lng1, lat2, lng2)).tolist()
+
+    # Like scalar functions, the loop uses the kernel of set_backend unless given a backend
+    kernel = _haversine_kernel if backend is None else _get_backend(backend, 'haversine_many').haversine_kernel
+    try:
+        if normalize:
+            return [r * kernel(*_normalize(lat1, lng1), *_normalize(lat2, lng2))
+                    for (lat1, lng1), (lat2, lng2) in pairs]
+        if check:
+            for point1, point2 in pairs:
+                _ensure_lat_lon(*point1)
+                _ensure_lat_lon(*point2)
+        return [r * kernel(lat1, lng1, lat2, lng2) for (lat1, lng1), (lat2, lng2) in pairs]
+    except (TypeError, ValueError):
+        # Raise the error of the numpy path for malformed pairs, which fail to be unpacked
+        _check_pairs(pairs)
+        raise
+
+
+def _check_pairs(pairs):
+    """
+    Raise an error if the pairs of a list are not all pairs of (latitude, longitude) points.
+    """
+    if pairs and {*map(len, pairs), *map(len, chain.from_iterable(pairs))} != {2}:
+        raise ValueError("pairs must be pairs of (latitude, longitude) points")
+
+
+def _pairs_coordinates(pairs) -> "numpy.ndarray":
+    """
+    Convert a list of (point1, point2) pairs to an array of shape (len(pairs), 4) of their
+    coordinates: (lat1, lng1, lat2, lng2) rows.
+    """
+    # Flattening the pairs would silently shift the coordinates after a malformed one
+    _check_pairs(pairs)
+    return numpy.fromiter(chain.from_iterable(chain.from_iterable(pairs)),
+                          dtype=float, count=4 * len(pairs)).reshape(-1, 4)
+
+
+def haversine_stream(pairs, unit=Unit.KILOMETERS, chunk_size=_STREAM_CHUNK_SIZE, normalize=False,
+                     check=True, backend=None) -> Iterator["numpy.ndarray"]:
+    """
+    Lazily calculate the great-circle distance of each pair of points of a (possibly huge) iterable,
+    such as the rows of a CSV file, with constant memory usage.
+
+    Pairs are read by chunks of ``chunk_size``, whose distances are computed with numpy and
+    yielded as arrays of up to ``chunk_size`` distances. The array yielded for a chunk is reused
+    for the next one: copy it if you need to keep it around.
+
+    :param pairs: iterable of (point1, point2) pairs, each point being a tuple of (latitude, longitude)
+    :param unit: the unit of the returned distances, see ``haversine``.
+    :param chunk_size: number of pairs computed at once.
+    :param normalize: if True, normalize the points to [-90, 90] latitude and [-180, 180] longitude.
+    :param check: if True, check that points are normalized.
+    :param backend: backend of the computation, see ``set_backend``; the current one if None.
+
+    Example::
+
+        with open('trips.csv') as f:
+            rows = csv.reader(f)
+            pairs = (((float(r[0]), float(r[1])), (float(r[2]), float(r[3]))) for r in rows)
+            total = sum(distances.sum() for distances in haversine_stream(pairs))
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be a positive number, got {chunk_size}")
+    backend = _get_backend(backend, 'haversine_stream')
+
+    r = get_avg_earth_radius(unit)
+    pairs = iter(pairs)
+    out = numpy.empty(chunk_size)
+    while True:
+        chunk = _pairs_coordinates(list(islice(pairs, chunk_size)))
+        if not len(chunk):
+            return
+        # The chunk is ours, so normalization can work in place
+        lat1, lng1 = _normalize_or_check_vector(chunk[:, 0], chunk[:, 1], normalize, check, True, backend)
+        lat2, lng2 = _normalize_or_check_vector(chunk[:, 2], chunk[:, 3], normalize, check, True, backend)
+        distances = out[:len(chunk)]
+        _scaled_kernel_into(backend, backend.haversine_kernel_vector, (lat1, lng1, lat2, lng2), r, distances)
+        yield distances
+
+
+def haversine_vector(array1, array2, unit=Unit.KILOMETERS, comb=False, normalize=False, check=True,
+                     out=None, max_memory=None, workers=None, dtype=None, inplace=False, backend=None,
+                     precision=Precision.FAST):
     '''
     The exact same function as "haversine", except that this
     version replaces math functions with numpy functions.
     This may make it slightly slower for computing the haversine
     distance between two points, but is much faster for computing
     the distance between two vectors of points due to vectorization.
+
+    :param out: optional array receiving the result. Its shape must be the one of the
+                result, i.e. ``(len(array2), len(array1))`` in combination mode.
+    :param max_memory: upper bound in bytes for the working memory used by the kernel.
+                       Distances (rows of the matrix in combination mode) are then computed
+                       by blocks instead of all at once (the result itself, or ``out``, is not
+                       accounted for). Defaults to 64 MiB when ``out`` is a ``numpy.memmap``.
+    :param workers: number of threads sharing the computation, -1 meaning one per CPU.
+                    Inputs too small to benefit from it are computed on the calling thread.
+    :param dtype: floating point type of the computation, e.g. ``numpy.float32`` to halve
+                  memory usage and bandwidth. Points are converted to it beforehand.
+    :param inplace: if True, normalization overwrites the given arrays (which must be floating
+                    point numpy arrays) instead of working on a copy of them.
+    :param backend: backend of the computation, see ``set_backend``; the current one if None.
+                    With an array module registered with ``register_backend``, points are
+                    converted to arrays of that module, and so is the result.
+    :param precision: kernel of the computation, see ``haversine.Precision``. Only the default
+                      one supports ``PreparedPoints``.
     '''
-    if not has_numpy:
-        raise RuntimeError('Error, unable to import Numpy, '
-                           'consider using haversine instead of haversine_vector.')
+    recorder = _stats
+    start = perf_counter() if recorder else 0.0
+    token = _stats_call.set(recorder) if recorder else None
+    try:
+        backend = _get_backend(backend, 'haversine_vector', array_api=True)
+        _check_array_api_options(backend, out=out, max_memory=max_memory, workers=workers, inplace=inplace)
+        kernel, args1, args2 = _prepare_kernel_args(array1, array2, comb, normalize, check, dtype, inplace, backend,
+                                                    precision)
+        kernel_start = perf_counter() if recorder else 0.0
+        result = _haversine_vector(backend, kernel, args1, args2, get_avg_earth_radius(unit), comb, out, max_memory,
+                                   workers, dtype)
+        if recorder:
+            recorder.record_stage('kernel', kernel_start, result.size)
+            recorder.record_call('haversine_vector', start, result.size)
+        return result
+    finally:
+        if token is not None:
+            _stats_call.reset(token)
+
+
+def haversine_vector_columns(lat1, lng1, lat2, lng2, unit=Unit.KILOMETERS, comb=False, normalize=False, check=True,
+                             out=None, max_memory=None, workers=None, dtype=None, inplace=False, backend=None,
+                             precision=Precision.FAST):
+    '''
+    Same as ``haversine_vector``, with points given as separate arrays of latitudes and
+    longitudes instead of arrays of (lat, lon) points.
+
+    Columns are used as is, without any copy, when they are numpy arrays or objects
+    exposing the buffer protocol or ``__array__`` (e.g. pandas series or Arrow arrays
+    without nulls) of the computation dtype.
+    '''
+    recorder = _stats
+    start = perf_counter() if recorder else 0.0
+    token = _stats_call.set(recorder) if recorder else None
+    try:
+        backend = _get_backend(backend, 'haversine_vector_columns', array_api=True)
+        _check_array_api_options(backend, out=out, max_memory=max_memory, workers=workers, inplace=inplace)
+        lat1, lng1 = _as_columns(lat1, lng1, normalize, check, dtype, inplace, backend)
+        lat2, lng2 = _as_columns(lat2, lng2, normalize, check, dtype, inplace, backend)
+        if not comb and lat1.shape != lat2.shape:
+            raise IndexError(
+                "When not in combination mode, arrays must be of same size. If mode is required, use comb=True as argument.")
+        kernel_start = perf_counter() if recorder else 0.0
+        result = _haversine_vector(backend, _select_haversine_kernel_vector(backend, precision), (lat1, lng1), (lat2, lng2),
+                                   get_avg_earth_radius(unit), comb, out, max_memory, workers, dtype)
+        if recorder:
+            recorder.record_stage('kernel', kernel_start, result.size)
+            recorder.record_call('haversine_vector_columns', start, result.size)
+        return result
+    finally:
+        if token is not None:
+            _stats_call.reset(token)
+
+
+def _haversine_vector(backend, kernel, args1, args2, r, comb, out, max_memory, workers, dtype):
+    """
+    Compute distances with the vector ``kernel`` of ``backend``, given the tuples of 1-D
+    arrays it expects for each point and the radius ``r`` of the sphere. See ``haversine_vector``
+    for the other parameters.
+    """
+    if backend.array_api:
+        if comb:
+            args1 = tuple(backend.xp.expand_dims(a, axis=0) for a in args1)
+            args2 = tuple(backend.xp.expand_dims(a, axis=1) for a in args2)
+        return r * kernel(*args1, *args2)
+
+    if max_memory is None and isinstance(out, numpy.memmap):
+        # Write to disk by blocks rather than materializing the whole result in memory first
+        max_memory = _DEFAULT_MAX_MEMORY
 
-    # ensure arrays are numpy ndarrays
-    if not isinstance(array1, numpy.ndarray):
-        array1 = numpy.array(array1)
-    if not isinstance(array2, numpy.ndarray):
-        array2 = numpy.array(array2)
+    if comb:
+        shape = (len(args2[0]), len(args1[0]))
+        workers = _effective_workers(workers, shape[0] * shape[1])
+        if out is None:
+            if max_memory is None and workers == 1:
+                # If in combination mode, turn coordinates of array1 into column vectors for broadcasting
+                return _scaled(r, kernel(*(numpy.expand_dims(a, axis=0) for a in args1),
+                                         *(numpy.expand_dims(a, axis=1) for a in args2)), dtype)
+            out = numpy.empty(shape, dtype=dtype or _kernel_result_type(*args1, *args2))
+        elif out.shape != shape:
+            raise ValueError(f"out must be of shape {shape}, got {out.shape}")
+
+        args1 = tuple(numpy.expand_dims(a, axis=0) for a in args1)
+
+        def compute_rows(start, stop):
+            _scaled_kernel_into(backend, kernel, (*args1, *(a[start:stop, None] for a in args2)), r, out[start:stop])
+
+        _map_ranges(compute_rows, shape[0], _block_rows(shape[1], max_memory, shape[0], workers), workers)
+        return out
+
+    shape = args1[0].shape
+    workers = _effective_workers(workers, shape[0])
+    if out is None:
+        if max_memory is None and workers == 1:
+            return _scaled(r, kernel(*args1, *args2), dtype)
+        out = numpy.empty(shape, dtype=dtype or _kernel_result_type(*args1, *args2))
+    elif out.shape != shape:
+        raise ValueError(f"out must be of shape {shape}, got {out.shape}")
+
+    def compute(start, stop):
+        _scaled_kernel_into(backend, kernel, (*(a[start:stop] for a in args1), *(a[start:stop] for a in args2)), r,
+                            out[start:stop])
+
+    _map_ranges(compute, shape[0], _block_rows(1, max_memory, shape[0], workers), workers)
+    return out
+
+
+def haversine_vector_blocks(array1, array2, unit=Unit.KILOMETERS, normalize=False, check=True,
+                            max_memory=_DEFAULT_MAX_MEMORY, dtype=None, backend=None):
+    '''
+    Lazily compute the combination matrix of ``haversine_vector(array1, array2, comb=True)``
+    by blocks of rows, so that its working memory stays below ``max_memory`` bytes.
+
+    Yields ``(start, block)`` tuples, where ``block`` holds the rows ``start:start + len(block)``
+    of the matrix, i.e. the distances from ``array2[start:start + len(block)]`` to every point
+    of ``array1``.
+    '''
+    backend = _get_backend(backend, 'haversine_vector_blocks')
+    kernel, args1, args2 = _prepare_kernel_args(array1, array2, True, normalize, check, dtype, backend=backend)
+    r = get_avg_earth_radius(unit)
+    yield from _iter_comb_blocks(kernel, args1, args2, r, _block_rows(len(args1[0]), max_memory), dtype)
+
+
+def haversine_pdist(points, unit=Unit.KILOMETERS, normalize=False, check=True, out=None, dtype=None, backend=None):
+    '''
+    Compute the distances between every pair of points of a single array, in the condensed
+    form of ``scipy.spatial.distance.pdist``: a 1-D array holding the upper triangle of the
+    distance matrix, row by row, i.e. the distances ``(0, 1), (0, 2), ..., (0, n-1), (1, 2), ...``.
+
+    Each pair is computed once, unlike ``haversine_vector(points, points, comb=True)``, and
+    the result can be given as is to ``scipy.cluster.hierarchy.linkage``.
+
+    :param points: array of (latitude, longitude) points in decimal degrees, or ``PreparedPoints``
+    :param out: optional array of length ``n * (n - 1) // 2`` receiving the result.
+    :param dtype: floating point type of the computation (see ``haversine_vector``).
+    :param backend: backend of the computation, see ``set_backend``; the current one if None.
+    '''
+    recorder = _stats
+    start = perf_counter() if recorder else 0.0
+    token = _stats_call.set(recorder) if recorder else None
+    try:
+        backend = _get_backend(backend, 'haversine_pdist')
+        if isinstance(points, PreparedPoints):
+            kernel, args = backend.prepared_haversine_kernel_vector, (points.lat, points.lng, points.cos_lat)
+        else:
+            kernel = backend.haversine_kernel_vector
+            args = _unpack_points(_as_points_array(points, dtype), normalize, check, backend=backend)
+        r = get_avg_earth_radius(unit)
+
+        n = len(args[0])
+        shape = (n * (n - 1) // 2,)
+        if out is None:
+            out = numpy.empty(shape, dtype=dtype or _kernel_result_type(*args))
+        elif out.shape != shape:
+            raise ValueError(f"out must be of shape {shape}, got {out.shape}")
+
+        kernel_start = perf_counter() if recorder else 0.0
+        row_start = 0
+        for i in range(n - 1):
+            row_stop = row_start + n - 1 - i
+            _scaled_kernel_into(backend, kernel, (*(a[i] for a in args), *(a[i + 1:] for a in args)), r,
+                                out[row_start:row_stop])
+            row_start = row_stop
+        if recorder:
+            recorder.record_stage('kernel', kernel_start, out.size)
+            recorder.record_call('haversine_pdist', start, out.size)
+        return out
+    finally:
+        if token is not None:
+            _stats_call.reset(token)
+
+
+def pairs_within(array1, array2, max_distance, unit=Unit.KILOMETERS, normalize=False, check=True,
+                 max_memory=_DEFAULT_MAX_MEMORY, backend=None) -> Tuple["numpy.ndarray", "numpy.ndarray", "numpy.ndarray"]:
+    '''
+    Find the pairs of points of array1 and array2 within ``max_distance`` of each other,
+    without computing the whole combination matrix of ``haversine_vector(array1, array2, comb=True)``.
+
+    Points of array2 are sorted by latitude, so that only the ones in the latitude band of
+    each point of array1 are considered; those outside of its bounding box in longitude are
+    then discarded before computing distances. Candidates are processed by chunks fitting
+    in ``max_memory`` bytes, so that memory usage grows with the number of pairs found
+    rather than with ``len(array1) * len(array2)``.
+
+    :param array1: array of (latitude, longitude) points in decimal degrees
+    :param array2: array of (latitude, longitude) points in decimal degrees
+    :param max_distance: maximal distance of the returned pairs, in ``unit``
+    :param unit: unit of ``max_distance`` and of the returned distances
+    :param max_memory: upper bound in bytes for the working memory (the result not included).
+    :param backend: backend of the computation, see ``set_backend``; the current one if None.
+    :return: a tuple ``(i, j, distances)`` of arrays: ``distances[k]`` is the distance between
+             ``array1[i[k]]`` and ``array2[j[k]]``, sorted by ``i`` then ``j``.
+
+    Example::
+
+        i, j, distances = pairs_within(stores, customers, 5, Unit.KILOMETERS)
+        # customers[j[k]] is within 5 km of stores[i[k]]
+    '''
+    backend = _get_backend(backend, 'pairs_within')
+    lat1, lng1 = _unpack_points(_as_points_array(array1), normalize, check, backend=backend)
+    lat2, lng2 = _unpack_points(_as_points_array(array2), normalize, check, backend=backend)
+    r = get_avg_earth_radius(unit)
+    # Angular radius, slightly enlarged so that pairs at max_distance are not lost to rounding
+    # by the prefilters; the distances computed at last decide.
+    angle = min(max(max_distance / r, 0.0), pi) * (1 + 1e-9) + 1e-12
+
+    # Points of array2 within the latitude band of each point of array1
+    order = numpy.argsort(lat2, kind='stable')
+    lat2, lng2 = lat2[order], lng2[order]
+    band = math.degrees(angle)
+    lo = numpy.searchsorted(lat2, lat1 - band, side='left')
+    counts = numpy.searchsorted(lat2, lat1 + band, side='right') - lo
+
+    # Half width in longitude of the bounding box of each point's cap, all longitudes if it
+    # contains a pole.
+    cos_lat1 = numpy.cos(numpy.radians(lat1))
+    ratio = numpy.divide(math.sin(angle), cos_lat1, out=numpy.full(len(lat1), 2.0), where=cos_lat1 > 0)
+    max_dlng = numpy.where((ratio < 1) & (angle < pi / 2), numpy.degrees(numpy.arcsin(numpy.minimum(ratio, 1))), 180.0)
+
+    budget = max(1, int(max_memory // _PAIRS_BYTES_PER_CANDIDATE))
+    ends = numpy.cumsum(counts)
+    found = []
+    start = 0
+    while start < len(lat1):
+        # Next points whose candidates fit in the budget, at least one
+        stop = max(int(numpy.searchsorted(ends, (ends[start - 1] if start else 0) + budget, side='right')), start + 1)
+        group_counts = counts[start:stop]
+        i = numpy.repeat(numpy.arange(start, stop), group_counts)
+        # Positions in the sorted array2 of the candidates of each point
+        k = numpy.arange(len(i)) - numpy.repeat(numpy.cumsum(group_counts) - group_counts - lo[start:stop], group_counts)
+        start = stop
+
+        dlng = numpy.abs(lng2[k] - lng1[i])
+        candidates = numpy.minimum(dlng, 360 - dlng) <= max_dlng[i]
+        i, k = i[candidates], k[candidates]
+        distances = _scaled(r, backend.haversine_kernel_vector(lat1[i], lng1[i], lat2[k], lng2[k]))
+        hits = distances <= max_distance
+        found.append((i[hits], order[k[hits]], distances[hits]))
+
+    i, j, distances = (numpy.concatenate([f[n] for f in found] + [numpy.empty(0, dtype=dtype)])
+                       for n, dtype in enumerate((numpy.intp, numpy.intp, float)))
+    by_pair = numpy.lexsort((j, i))
+    return i[by_pair], j[by_pair], distances[by_pair]
+
+
+def _prepare_kernel_args(array1, array2, comb, normalize, check, dtype=None, inplace=False, backend=None,
+                         precision=Precision.FAST):
+    """
+    Pick the vector kernel of the backend suited to the given arrays of points and precision,
+    and unpack them into the tuples of 1-D arrays it expects for each point.
+    """
+    backend = backend or _get_backend()
+    if isinstance(array1, PreparedPoints) or isinstance(array2, PreparedPoints):
+        if Precision(precision) is not Precision.FAST:
+            raise ValueError(f"PreparedPoints only support the {Precision.FAST.value!r} precision")
+        if backend.array_api:
+            raise ValueError(f"PreparedPoints are not supported by the {backend.name!r} backend")
+        points1 = array1 if isinstance(array1, PreparedPoints) else PreparedPoints(array1, normalize, check, dtype, backend)
+        points2 = array2 if isinstance(array2, PreparedPoints) else PreparedPoints(array2, normalize, check, dtype, backend)
+        if not comb and len(points1) != len(points2):
+            raise IndexError(
+                "When not in combination mode, arrays must be of same size. If mode is required, use comb=True as argument.")
+        return (backend.prepared_haversine_kernel_vector,
+                (points1.lat, points1.lng, points1.cos_lat), (points2.lat, points2.lng, points2.cos_lat))
 
-    # ensure will be able to iterate over rows by adding dimension if needed
-    if array1.ndim == 1:
-        array1 = numpy.expand_dims(array1, 0)
-    if array2.ndim == 1:
-        array2 = numpy.expand_dims(array2, 0)
+    lat1, lng1, lat2, lng2 = _prepare_vector_args(array1, array2, comb, normalize, check, dtype, inplace, backend)
+    return _select_haversine_kernel_vector(backend, precision), (lat1, lng1), (lat2, lng2)
+
+
+def _select_haversine_kernel_vector(backend, precision):
+    """
+    Return the vector kernel of haversine of ``backend`` of the given precision.
+    """
+    if precision is _FAST:
+        return backend.haversine_kernel_vector
+    precision = Precision(precision)
+    if precision is Precision.FAST:
+        return backend.haversine_kernel_vector
+    if precision is Precision.ACCURATE:
+        return backend.accurate_haversine_kernel_vector
+    return backend.hybrid_haversine_kernel_vector
+
+
+def _prepare_vector_args(array1, array2, comb, normalize, check, dtype=None, inplace=False, backend=None):
+    """
+    Unpack two arrays of (lat, lon) points into 1-D latitude and longitude arrays,
+    normalizing or checking them on the way.
+    """
+    array1 = _as_points_array(array1, dtype, backend)
+    array2 = _as_points_array(array2, dtype, backend)
 
     # Asserts that both arrays have same dimensions if not in combination mode
     if not comb:
@@ -251,62 +1443,400 @@ def haversine_vector(array1, array2, unit=Unit.KILOMETERS, comb=False, normalize
             raise IndexError(
                 "When not in combination mode, arrays must be of same size. If mode is required, use comb=True as argument.")
 
+    return (_unpack_points(array1, normalize, check, inplace, backend)
+            + _unpack_points(array2, normalize, check, inplace, backend))
+
+
+def _as_columns(lat, lng, normalize, check, dtype, inplace, backend):
+    """
+    Convert latitude and longitude columns to 1-D arrays of the backend, normalizing or checking them on the way.
+    """
+    recorder = _stats and _stats_call.get()
+    start = perf_counter() if recorder else 0.0
+    if backend.array_api:
+        lat, lng = _as_array_api(backend.xp, lat, dtype), _as_array_api(backend.xp, lng, dtype)
+    else:
+        lat = numpy.asarray(lat, dtype=dtype)
+        lng = numpy.asarray(lng, dtype=dtype)
+    if lat.ndim != 1 or lat.shape != lng.shape:
+        raise IndexError("Latitudes and longitudes must be 1-D arrays of same size.")
+    if recorder:
+        recorder.record_stage('convert', start, lat.shape[0])
+    return _normalize_or_check_vector(lat, lng, normalize, check, inplace, backend)
+
+
+def _as_array_api(xp, array, dtype=None):
+    """
+    Convert an array to one of the array module xp, of floating point type if no dtype is
+    given, as the array API does not define trigonometric functions of integers.
+    """
+    array = xp.asarray(array, dtype=dtype)
+    if dtype is None and not xp.isdtype(array.dtype, 'real floating'):
+        array = xp.astype(array, xp.float64)
+    return array
+
+
+def _as_points_array(array, dtype=None, backend=None):
+    """
+    Convert an array of (lat, lon) points, or a single point, to a 2-D numpy array (or array
+    of an ``array_api`` backend), of the given dtype if any.
+    """
+    _require_numpy('haversine_vector', 'haversine')
+    recorder = _stats and _stats_call.get()
+    start = perf_counter() if recorder else 0.0
+
+    if backend is not None and backend.array_api:
+        array = _as_array_api(backend.xp, array, dtype)
+        if array.ndim == 1:
+            # An empty array has no points, rather than a single point without coordinates
+            array = backend.xp.expand_dims(array, axis=0) if array.shape[0] else backend.xp.reshape(array, (0, 2))
+    else:
+        # ensure arrays are numpy ndarrays
+        if not isinstance(array, numpy.ndarray):
+            array = numpy.array(array, dtype=dtype)
+        elif dtype is not None:
+            array = array.astype(dtype, copy=False)
+
+        # ensure will be able to iterate over rows by adding dimension if needed; an empty
+        # array has no points, rather than a single point without coordinates
+        if array.ndim == 1:
+            array = numpy.expand_dims(array, 0) if len(array) else array.reshape(0, 2)
+
+    if recorder:
+        recorder.record_stage('convert', start, array.shape[0])
+    return array
+
+
+def _unpack_points(array, normalize=False, check=True, inplace=False, backend=None):
+    """
+    Unpack a 2-D array of (lat, lon) points into latitude and longitude arrays.
+    """
     # unpack latitude/longitude
-    lat1, lng1 = array1[:, 0], array1[:, 1]
-    lat2, lng2 = array2[:, 0], array2[:, 1]
+    return _normalize_or_check_vector(array[:, 0], array[:, 1], normalize, check, inplace, backend)
+
 
+def _normalize_or_check_vector(lat, lng, normalize, check, inplace=False, backend=None):
+    """
+    Normalize the given latitudes and longitudes, or ensure they are proper lat/lon, with
+    the given backend (the current one if None).
+    """
     # normalize points or ensure they are proper lat/lon, i.e., in [-90, 90] and [-180, 180]
     if normalize:
-        lat1, lng1 = _normalize_vector(lat1, lng1)
-        lat2, lng2 = _normalize_vector(lat2, lng2)
+        lat, lng = _normalize_vector(lat, lng, inplace, backend)
     elif check:
-        _ensure_lat_lon_vector(lat1, lng1)
-        _ensure_lat_lon_vector(lat2, lng2)
+        _ensure_lat_lon_vector(lat, lng, backend)
+    return lat, lng
 
-    # If in combination mode, turn coordinates of array1 into column vectors for broadcasting
-    if comb:
-        lat1 = numpy.expand_dims(lat1, axis=0)
-        lng1 = numpy.expand_dims(lng1, axis=0)
-        lat2 = numpy.expand_dims(lat2, axis=1)
-        lng2 = numpy.expand_dims(lng2, axis=1)
 
-    return get_avg_earth_radius(unit) * _haversine_kernel_vector(lat1, lng1, lat2, lng2)
+def _kernel_result_type(*args):
+    """
+    Floating point type of the distances computed by a kernel from the given arrays, so that
+    results computed by blocks have the type of the ones computed at once.
+    """
+    return numpy.result_type(*args, 0.0)
 
 
-def inverse_haversine(point, distance, direction: Union[Direction, float], unit=Unit.KILOMETERS, normalize_output=False):
-    lat, lng = point
-    r = get_avg_earth_radius(unit)
-    outLat, outLng = _inverse_haversine_kernel(lat, lng, direction, distance / r)
+def _scaled(r, distances, dtype=None):
+    """
+    Return r * distances, scaling in place the array of distances just computed by a kernel.
+    """
+    if dtype is None or distances.dtype == dtype:
+        return numpy.multiply(distances, r, out=distances)
+    return numpy.multiply(r, distances, dtype=dtype)
 
-    if normalize_output:
-        return _normalize(outLat, outLng)
+
+def _scaled_kernel_into(backend, kernel, args, r, out):
+    """
+    Write r * kernel(*args) into out. Ufunc kernels write straight into it, and are scaled
+    in place, so that no temporary array is allocated.
+    """
+    if backend.ufunc_kernels:
+        numpy.multiply(kernel(*args, out=out), r, out=out)
     else:
-        return (outLat, outLng)
+        numpy.multiply(r, kernel(*args), out=out)
 
 
-def inverse_haversine_vector(array, distance, direction, unit=Unit.KILOMETERS, normalize_output=False): # -> Tuple["numpy.ndarray", "numpy.ndarray"]:
-    if not has_numpy:
-        raise RuntimeError('Error, unable to import Numpy, '
-                           'consider using inverse_haversine instead of inverse_haversine_vector.')
+def _block_rows(n_cols, max_memory, n_rows=None, workers=1):
+    """
+    Number of rows of a combination matrix with ``n_cols`` columns (1 for a vector of
+    distances) whose computation fits in ``max_memory`` bytes (all rows if ``max_memory``
+    is None). When computed by several workers, blocks share the memory budget and there
+    are enough of them to keep every worker busy.
+    """
+    rows = None
+    if max_memory is not None:
+        rows = max(1, int(max_memory // (_KERNEL_BYTES_PER_DISTANCE * max(n_cols, 1) * workers)))
+    if workers > 1:
+        rows = min(rows or n_rows, -(-n_rows // workers))
+    return rows
 
-    # ensure arrays are numpy ndarrays
-    array, distance, direction = map(numpy.asarray, (array, distance, direction))
 
-    # ensure will be able to iterate over rows by adding dimension if needed
-    if array.ndim == 1:
-        array = numpy.expand_dims(array, 0)
+def _effective_workers(workers, size):
+    """
+    Number of threads to use for computing ``size`` distances, given the ``workers``
+    requested by the caller.
+    """
+    if workers is None:
+        return 1
+    # Validated whatever the size, so that invalid values do not only fail on large inputs
+    if workers < 1 and workers != -1:
+        raise ValueError(f"workers must be a positive number or -1, got {workers}")
+    if size < _PARALLEL_MIN_SIZE:
+        return 1
+    if workers == -1:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def _map_ranges(func, n, step, workers):
+    """
+    Call ``func(start, stop)`` over consecutive ranges of length ``step`` covering ``range(n)``,
+    on a pool of ``workers`` threads if there is more than one.
+    """
+    step = step or n or 1
+    ranges = [(start, min(start + step, n)) for start in range(0, n, step)]
+    if workers == 1 or len(ranges) <= 1:
+        for start, stop in ranges:
+            func(start, stop)
+        return
+    from concurrent.futures import ThreadPoolExecutor
 
-    # Asserts that arrays are correctly sized
-    if array.ndim != 2 or array.shape[1] != 2 or array.shape[0] != len(distance) or array.shape[0] != len(direction):
-        raise IndexError("Arrays must be of same size.")
+    # numpy (and numba) kernels release the GIL, so threads do run in parallel
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in executor.map(lambda r: func(*r), ranges):
+            pass
 
-    # unpack latitude/longitude
-    lat, lng = array[:, 0], array[:, 1]
 
+def _iter_comb_blocks(kernel, args1, args2, r, block_rows, dtype=None):
+    """
+    Yield ``(start, block)`` tuples covering the combination matrix of distances (in the
+    unit of the radius ``r``) between points 2 (rows) and points 1 (columns), given as
+    the tuples of 1-D arrays expected by ``kernel``.
+    """
+    n_rows = len(args2[0])
+    block_rows = block_rows or n_rows or 1
+    args1 = tuple(numpy.expand_dims(a, axis=0) for a in args1)
+    for start in range(0, n_rows, block_rows):
+        stop = min(start + block_rows, n_rows)
+        yield start, _scaled(r, kernel(*args1, *(a[start:stop, None] for a in args2)), dtype)
+
+
+class PreparedPoints:
+    """
+    Array of (lat, lon) points prepared for repeated distance computations.
+
+    The conversion to radians and the cosine of the latitudes are computed once, so that
+    ``haversine_vector`` only computes the remaining trigonometry when given prepared points
+    (in place of either or both of its arrays). Prepared points are validated, or normalized,
+    when created.
+
+    Example::
+
+        depots = PreparedPoints(depot_coordinates)
+        for vehicles in positions_stream:
+            distances = haversine_vector(vehicles, depots, comb=True)
+
+    :ivar lat: latitudes, in radians
+    :ivar lng: longitudes, in radians
+    :ivar cos_lat: cosines of the latitudes
+    """
+
+    __slots__ = ('lat', 'lng', 'cos_lat')
+
+    def __init__(self, points, normalize=False, check=True, dtype=None, backend=None):
+        """
+        :param points: array of (latitude, longitude) points in decimal degrees
+        :param normalize: if True, normalize the points to [-90, 90] latitude and [-180, 180] longitude.
+        :param check: if True, check that points are normalized.
+        :param dtype: floating point type of the prepared arrays, if not the one of ``points``.
+        :param backend: backend normalizing or checking the points, see ``set_backend``.
+        """
+        backend = _get_backend(backend, 'PreparedPoints')
+        lat, lng = _unpack_points(_as_points_array(points, dtype), normalize, check, backend=backend)
+        self.lat = numpy.radians(lat)
+        self.lng = numpy.radians(lng)
+        self.cos_lat = numpy.cos(self.lat)
+
+    def __len__(self):
+        return len(self.lat)
+
+
+def path_length(points, unit=Unit.KILOMETERS, normalize=False, check=True, backend=None) -> float:
+    """
+    Calculate the length of the path (e.g. a GPS track) going through the given points, in order.
+
+    :param points: array of (latitude, longitude) points in decimal degrees
+    :param unit: the unit of the returned length, see ``haversine``.
+    :param normalize: if True, normalize the points to [-90, 90] latitude and [-180, 180] longitude.
+    :param check: if True, check that points are normalized.
+    :param backend: backend of the computation, see ``set_backend``; the current one if None.
+    """
+    backend = _get_backend(backend, 'path_length')
+    lat, lng = _unpack_points(_as_points_array(points), normalize, check, backend=backend)
+    length = numpy.empty(1)
+    backend.path_lengths_into(lat, lng, numpy.array([0, len(lat)]), length)
+    return get_avg_earth_radius(unit) * float(length[0])
+
+
+def cumulative_distance(points, unit=Unit.KILOMETERS, normalize=False, check=True, backend=None) -> "numpy.ndarray":
+    """
+    Calculate the distance travelled from the first point to each point of the path going
+    through the given points, in order.
+
+    :param points: array of (latitude, longitude) points in decimal degrees
+    :param unit: the unit of the returned distances, see ``haversine``.
+    :param normalize: if True, normalize the points to [-90, 90] latitude and [-180, 180] longitude.
+    :param check: if True, check that points are normalized.
+    :param backend: backend of the computation, see ``set_backend``; the current one if None.
+    :return: an array of the same length as points, starting with 0.
+    """
+    backend = _get_backend(backend, 'cumulative_distance')
+    lat, lng = _unpack_points(_as_points_array(points), normalize, check, backend=backend)
+    distances = numpy.empty(len(lat))
+    backend.cumulative_distance_into(lat, lng, distances)
+    distances *= get_avg_earth_radius(unit)
+    return distances
+
+
+def path_lengths(points, offsets, unit=Unit.KILOMETERS, normalize=False, check=True, backend=None) -> "numpy.ndarray":
+    """
+    Calculate the lengths of many paths at once, their points being concatenated in a single
+    array: path ``i`` goes through ``points[offsets[i]:offsets[i + 1]]``.
+
+    :param points: array of (latitude, longitude) points in decimal degrees
+    :param offsets: non-decreasing array of indices into points, of length the number of paths + 1
+    :param unit: the unit of the returned lengths, see ``haversine``.
+    :param normalize: if True, normalize the points to [-90, 90] latitude and [-180, 180] longitude.
+    :param check: if True, check that points are normalized.
+    :param backend: backend of the computation, see ``set_backend``; the current one if None.
+    :return: an array of ``len(offsets) - 1`` lengths.
+    """
+    backend = _get_backend(backend, 'path_lengths')
+    lat, lng = _unpack_points(_as_points_array(points), normalize, check, backend=backend)
+    offsets = numpy.asarray(offsets, dtype=numpy.intp)
+    if offsets.ndim != 1 or len(offsets) < 1:
+        raise IndexError("Offsets must be a 1-D array of at least one index.")
+    if offsets[0] < 0 or offsets[-1] > len(lat) or numpy.any(offsets[1:] < offsets[:-1]):
+        raise ValueError(f"Offsets must be non-decreasing indices in [0, {len(lat)}]")
+    lengths = numpy.empty(len(offsets) - 1)
+    backend.path_lengths_into(lat, lng, offsets, lengths)
+    lengths *= get_avg_earth_radius(unit)
+    return lengths
+
+
+def inverse_haversine(point, distance, direction: Union[Direction, float], unit=Unit.KILOMETERS, normalize_output=False):
+    lat, lng = point
     r = get_avg_earth_radius(unit)
-    outLatArray, outLngArray = _inverse_haversine_kernel_vector(lat, lng, direction, distance/r)
+    outLat, outLng = _inverse_haversine_kernel(lat, lng, direction, distance / r)
 
     if normalize_output:
-        return _normalize_vector(outLatArray, outLngArray)
+        return _normalize(outLat, outLng)
+    else:
+        return (outLat, outLng)
+
 
-    return (outLatArray, outLngArray)
\ No newline at end of file
+def inverse_haversine_vector(array, distance, direction, unit=Unit.KILOMETERS, normalize_output=False,
+                             workers=None, backend=None, comb=False, out_lat=None, out_lng=None): # -> Tuple["numpy.ndarray", "numpy.ndarray"]:
+    '''
+    The vector version of ``inverse_haversine``: compute the points at ``distance`` (in ``unit``)
+    of each point of ``array`` in ``direction`` (in radians), returning arrays of their
+    latitudes and longitudes.
+
+    :param comb: if True, compute the points at every distance of ``distance`` in every
+                 direction of ``direction`` from each point of ``array`` (e.g. isochrone
+                 rings), in arrays of shape ``(len(array), len(distance), len(direction))``.
+                 The trigonometry of each point, distance and direction is then computed once.
+                 Otherwise, all three arrays must be of the same length.
+    :param workers: number of threads sharing the computation, -1 meaning one per CPU.
+    :param backend: backend of the computation, see ``set_backend``; the current one if None.
+    :param out_lat: optional array receiving the latitudes, of the shape of the result.
+    :param out_lng: optional array receiving the longitudes, given along with ``out_lat``.
+                    Outside of combination mode, the numba backend then computes the points
+                    without allocating any array.
+    '''
+    recorder = _stats
+    start = perf_counter() if recorder else 0.0
+    token = _stats_call.set(recorder) if recorder else None
+    try:
+        backend = _get_backend(backend, 'inverse_haversine_vector', 'inverse_haversine', array_api=True)
+        _check_array_api_options(backend, workers=workers, out_lat=out_lat, out_lng=out_lng)
+        if (out_lat is None) != (out_lng is None):
+            raise ValueError("out_lat and out_lng must be given together")
+        xp = backend.xp
+
+        # ensure arrays are numpy ndarrays (or arrays of the backend)
+        if backend.array_api:
+            array, distance, direction = (_as_array_api(xp, a) for a in (array, distance, direction))
+        else:
+            array, distance, direction = map(numpy.asarray, (array, distance, direction))
+
+        # ensure will be able to iterate over rows by adding dimension if needed
+        if array.ndim == 1:
+            array = xp.expand_dims(array, axis=0)
+
+        r = get_avg_earth_radius(unit)
+        if comb:
+            if array.ndim != 2 or array.shape[1] != 2 or distance.ndim > 1 or direction.ndim > 1:
+                raise IndexError("In combination mode, array must be an array of points, distance and direction 1-D arrays.")
+            distance, direction = xp.reshape(distance, (-1,)), xp.reshape(direction, (-1,))
+            shape = (array.shape[0], distance.shape[0], direction.shape[0])
+            # Points, distances and directions along the axes of the result: the kernel computes their
+            # own trigonometry before broadcasting them together.
+            lat, lng = xp.reshape(array[:, 0], (-1, 1, 1)), xp.reshape(array[:, 1], (-1, 1, 1))
+            distance, direction = xp.reshape(distance / r, (1, -1, 1)), xp.reshape(direction, (1, 1, -1))
+        else:
+            # Asserts that arrays are correctly sized
+            if array.ndim != 2 or array.shape[1] != 2 or array.shape[:1] != distance.shape[:1] or array.shape[:1] != direction.shape[:1]:
+                raise IndexError("Arrays must be of same size.")
+            shape = array.shape[:1]
+            # unpack latitude/longitude
+            lat, lng = array[:, 0], array[:, 1]
+        if out_lat is not None and (out_lat.shape != shape or out_lng.shape != shape):
+            raise ValueError(f"out_lat and out_lng must be of shape {shape}, got {out_lat.shape} and {out_lng.shape}")
+
+        size = shape[0] * shape[1] * shape[2] if comb else shape[0]
+        workers = _effective_workers(workers, size)
+        kernel = backend.inverse_haversine_kernel_vector
+        kernel_start = perf_counter() if recorder else 0.0
+        if backend.array_api:
+            outLatArray, outLngArray = kernel(lat, lng, direction, distance if comb else distance / r)
+        elif comb:
+            outLatArray = numpy.empty(shape) if out_lat is None else out_lat
+            outLngArray = numpy.empty(shape) if out_lng is None else out_lng
+
+            def compute(start, stop):
+                # Distances and directions are shared by all points
+                outLatArray[start:stop], outLngArray[start:stop] = kernel(lat[start:stop], lng[start:stop], direction,
+                                                                          distance)
+
+            _map_ranges(compute, shape[0], -(-shape[0] // workers), workers)
+        else:
+            outLatArray = numpy.empty(shape) if out_lat is None else out_lat
+            outLngArray = numpy.empty(shape) if out_lng is None else out_lng
+
+            def compute(start, stop):
+                backend.inverse_haversine_into(lat[start:stop], lng[start:stop], direction[start:stop],
+                                               distance[start:stop], r, outLatArray[start:stop], outLngArray[start:stop])
+
+            _map_ranges(compute, shape[0], -(-shape[0] // workers), workers)
+        if recorder:
+            recorder.record_stage('kernel', kernel_start, size)
+
+        if normalize_output:
+            # Normalize the flattened points, in place for numpy arrays
+            normalized = _normalize_vector(xp.reshape(outLatArray, (-1,)), xp.reshape(outLngArray, (-1,)), inplace=True,
+                                           backend=backend)
+            if backend.array_api:
+                outLatArray, outLngArray = (xp.reshape(a, shape) for a in normalized)
+            else:
+                # Flattening non-contiguous out buffers copies them
+                for out, a in zip((outLatArray, outLngArray), normalized):
+                    if not numpy.may_share_memory(out, a):
+                        out[...] = a.reshape(shape)
+
+        if recorder:
+            recorder.record_call('inverse_haversine_vector', start, size)
+        return (outLatArray, outLngArray)
+    finally:
+        if token is not None:
+            _stats_call.reset(token)
@@ -0,0 +1,155 @@
+from math import pi
+from typing import List, Tuple
+
+import numpy
+
+from .haversine import (Unit, get_avg_earth_radius, _as_points_array, _unpack_points, _get_backend,
+                        _iter_comb_blocks, _block_rows, _DEFAULT_MAX_MEMORY)
+
+
+def _load_kdtree():
+    """
+    Return scipy's KD-tree class, or None if scipy is not installed.
+    """
+    try:
+        from scipy.spatial import cKDTree  # type: ignore
+    except ModuleNotFoundError:
+        return None
+    return cKDTree
+
+
+def _to_unit_vectors(lat: "numpy.ndarray", lng: "numpy.ndarray") -> "numpy.ndarray":
+    """
+    Convert points in degrees to 3D vectors on the unit sphere.
+    """
+    lat = numpy.radians(lat)
+    lng = numpy.radians(lng)
+    cos_lat = numpy.cos(lat)
+    return numpy.column_stack((cos_lat * numpy.cos(lng), cos_lat * numpy.sin(lng), numpy.sin(lat)))
+
+
+def _chord_length(angle: float) -> float:
+    """
+    Length of the chord subtending ``angle`` radians on the unit sphere, slightly
+    enlarged so that points exactly at that distance are not lost to rounding.
+    """
+    if angle >= pi:
+        return 2.0 + 1e-9
+    return 2 * numpy.sin(max(angle, 0.0) * 0.5) * (1 + 1e-9) + 1e-12
+
+
+class HaversineIndex:
+    """
+    Spatial index over a set of (lat, lon) points, answering nearest neighbour and
+    radius queries.
+
+    Points are indexed as vectors on the unit sphere, where the euclidean (chord) distance
+    grows with the great-circle distance, in a KD-tree. Candidates are then measured one at
+    a time with the scalar kernel, so that returned distances are the ones of ``haversine``.
+    Kernels are the ones of the current backend (see ``set_backend``), which must be numpy based.
+
+    The KD-tree requires `scipy <https://pypi.org/project/scipy/>`_; without it, queries
+    fall back to a brute-force scan by blocks.
+
+    Example::
+
+        index = HaversineIndex(stores)
+        distances, indices = index.query_knn(customers, k=3)
+    """
+
+    def __init__(self, points, normalize=False, check=True):
+        """
+        :param points: array of (latitude, longitude) points in decimal degrees
+        :param normalize: if True, normalize the points to [-90, 90] latitude and [-180, 180] longitude.
+        :param check: if True, check that points are normalized.
+        """
+        backend = _get_backend(None, 'HaversineIndex')
+        self._lat, self._lng = (numpy.ascontiguousarray(a) for a in
+                                _unpack_points(_as_points_array(points), normalize, check, backend=backend))
+        kdtree = _load_kdtree()
+        self._tree = kdtree(_to_unit_vectors(self._lat, self._lng)) if kdtree is not None else None
+
+    def __len__(self):
+        return len(self._lat)
+
+    def _distances(self, backend, lat, lng, indices, unit):
+        """
+        Measure the distances between the given points and the indexed ones at ``indices``
+        with the scalar kernel of the backend: vector kernels may differ in the last bits.
+        """
+        lat, lng, indices = numpy.broadcast_arrays(lat, lng, indices)
+        out = numpy.empty(indices.shape)
+        backend.haversine_pairs_into(lat.ravel(), lng.ravel(), self._lat[indices.ravel()], self._lng[indices.ravel()],
+                                     out.reshape(-1))
+        return get_avg_earth_radius(unit) * out
+
+    def query_knn(self, points, k=1, unit=Unit.KILOMETERS, normalize=False, check=True) -> Tuple["numpy.ndarray", "numpy.ndarray"]:
+        """
+        Find the ``k`` indexed points closest to each of the given points.
+
+        :param points: array of (latitude, longitude) points in decimal degrees
+        :param k: number of neighbours to return per point
+        :param unit: unit of the returned distances
+        :return: a tuple ``(distances, indices)`` of arrays of shape ``(len(points), k)``,
+                 sorted by increasing distance.
+        """
+        if not 1 <= k <= len(self):
+            raise ValueError(f"k must be in [1, {len(self)}], got {k}")
+        backend = _get_backend(None, 'HaversineIndex')
+        kernel = backend.haversine_kernel_vector
+        lat, lng = _unpack_points(_as_points_array(points), normalize, check, backend=backend)
+
+        if self._tree is not None:
+            _, indices = self._tree.query(_to_unit_vectors(lat, lng), k=k)
+            indices = indices.reshape(len(lat), k)
+        else:
+            indices = numpy.empty((len(lat), k), dtype=numpy.intp)
+            # Rows of the blocks are the queried points, columns the indexed ones
+            blocks = _iter_comb_blocks(kernel, (self._lat, self._lng), (lat, lng), 1.0,
+                                       _block_rows(len(self), _DEFAULT_MAX_MEMORY))
+            for start, block in blocks:
+                indices[start:start + len(block)] = numpy.argpartition(block, k - 1, axis=1)[:, :k]
+
+        distances = self._distances(backend, lat[:, None], lng[:, None], indices, unit)
+        # Order neighbours by the exact haversine distance
+        order = numpy.argsort(distances, axis=1, kind='stable')
+        return numpy.take_along_axis(distances, order, axis=1), numpy.take_along_axis(indices, order, axis=1)
+
+    def query_radius(self, points, r, unit=Unit.KILOMETERS, normalize=False, check=True) -> Tuple[List["numpy.ndarray"], List["numpy.ndarray"]]:
+        """
+        Find the indexed points within distance ``r`` of each of the given points.
+
+        :param points: array of (latitude, longitude) points in decimal degrees
+        :param r: maximal distance, in ``unit``
+        :param unit: unit of ``r`` and of the returned distances
+        :return: a tuple ``(distances, indices)`` of lists holding, for each point, the
+                 arrays of distances and indices of its neighbours, sorted by increasing distance.
+        """
+        backend = _get_backend(None, 'HaversineIndex')
+        kernel = backend.haversine_kernel_vector
+        lat, lng = _unpack_points(_as_points_array(points), normalize, check, backend=backend)
+        radius = get_avg_earth_radius(unit)
+
+        if self._tree is not None:
+            candidates = self._tree.query_ball_point(_to_unit_vectors(lat, lng), _chord_length(r / radius))
+        else:
+            candidates = [None] * len(lat)
+            blocks = _iter_comb_blocks(kernel, (self._lat, self._lng), (lat, lng), radius,
+                                       _block_rows(len(self), _DEFAULT_MAX_MEMORY))
+            for start, block in blocks:
+                # Enlarged as the chord length, as the final distances are measured again
+                for i, row in enumerate(block, start):
+                    candidates[i] = numpy.flatnonzero(row <= r * (1 + 1e-9))
+
+        # Measure all candidates at once, then split them back per queried point
+        counts = numpy.fromiter(map(len, candidates), dtype=numpy.intp, count=len(candidates))
+        indices = numpy.concatenate([numpy.asarray(c, dtype=numpy.intp) for c in candidates]
+                                    + [numpy.empty(0, dtype=numpy.intp)])
+        queries = numpy.repeat(numpy.arange(len(candidates)), counts)
+        distances = self._distances(backend, lat[queries], lng[queries], indices, unit)
+
+        keep = distances <= r
+        queries, indices, distances = queries[keep], indices[keep], distances[keep]
+        order = numpy.lexsort((distances, queries))
+        splits = numpy.cumsum(numpy.bincount(queries, minlength=len(candidates)))[:-1]
+        return numpy.split(distances[order], splits), numpy.split(indices[order], splits)
@@ -7,7 +7,7 @@ setup(
     long_description=open('README.md').read(),
     long_description_content_type="text/markdown",
     include_package_data=True,
-    python_requires='>=3.5',
+    python_requires='>=3.7',
     author='Balthazar Rouberol',
     maintainer='Julien Deniau',
     maintainer_email='julien.deniau@mapado.com',
@@ -19,8 +19,6 @@ setup(
         'Intended Audience :: Developers',
         'License :: OSI Approved :: MIT License',
         'Programming Language :: Python',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',
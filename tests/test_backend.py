@@ -0,0 +1,155 @@
+from importlib import import_module
+from haversine import (haversine, haversine_many, haversine_vector, haversine_vector_columns, inverse_haversine_vector, path_length,
+                       get_backend, register_backend, set_backend, use_backend, Precision, Unit)
+from numpy.testing import assert_allclose
+import numpy as np
+import pytest
+
+from tests.geo_ressources import EXPECTED_LYON_NEW_YORK, EXPECTED_LYON_PARIS, LYON, PARIS, NEW_YORK
+
+@pytest.fixture(autouse=True)
+def array_api_backend():
+    # Registering numpy as an array module runs it through the array API code path
+    register_backend('numpy_array_api', np)
+    yield
+    haversine_module = import_module('haversine.haversine')
+    del haversine_module._BACKEND_FACTORIES['numpy_array_api']
+    haversine_module._backends.pop('numpy_array_api', None)
+
+
+@pytest.fixture(autouse=True)
+def reset_backend(array_api_backend):
+    yield
+    set_backend(None)
+
+
+def backends():
+    names = ['numpy', 'numpy_array_api']
+    try:
+        import numba  # noqa: F401
+        names.append('numba')
+    except ModuleNotFoundError:
+        pass
+    return names
+
+
+@pytest.mark.parametrize('backend', backends())
+@pytest.mark.parametrize('comb', [False, True])
+def test_haversine_vector_backend(backend, comb):
+    points1 = np.random.uniform(-45, 45, size=(20, 2))
+    points2 = np.random.uniform(-45, 45, size=(20, 2))
+    expected = haversine_vector(points1, points2, comb=comb, backend='numpy')
+
+    assert_allclose(haversine_vector(points1, points2, comb=comb, backend=backend), expected)
+    assert_allclose(haversine_vector(points1 + 360, points2, comb=comb, normalize=True, backend=backend), expected)
+    assert_allclose(haversine_vector_columns(*points1.T, *points2.T, comb=comb, backend=backend), expected)
+    with pytest.raises(ValueError):
+        haversine_vector(points1 + 360, points2, comb=comb, backend=backend)
+
+
+@pytest.mark.parametrize('backend', backends())
+@pytest.mark.parametrize('precision', [Precision.ACCURATE, Precision.HYBRID])
+def test_haversine_vector_precision_backend(backend, precision):
+    points1 = np.random.uniform(-45, 45, size=(20, 2))
+    points2 = np.vstack((np.random.uniform(-45, 45, size=(10, 2)), -points1[10:] + [0, 1e-5]))
+    points2[10:, 1] -= np.copysign(180, points2[10:, 1])
+    expected = haversine_vector(points1, points2, Unit.RADIANS, comb=True, precision=precision, backend='numpy')
+
+    assert_allclose(haversine_vector(points1, points2, Unit.RADIANS, comb=True, precision=precision, backend=backend),
+                    expected, rtol=1e-14)
+    assert_allclose(haversine_vector(points1, points2, Unit.RADIANS, precision=precision, backend=backend),
+                    np.diagonal(expected), rtol=1e-14)
+
+
+@pytest.mark.parametrize('backend', backends())
+@pytest.mark.parametrize('normalize', [False, True])
+def test_haversine_vector_empty_backend(backend, normalize):
+    empty = np.empty((0, 2))
+    assert haversine_vector([], [], normalize=normalize, backend=backend).shape == (0,)
+    assert haversine_vector(empty, empty, normalize=normalize, backend=backend).shape == (0,)
+    assert haversine_vector(empty, empty, comb=True, normalize=normalize, backend=backend).shape == (0, 0)
+    assert haversine_vector(empty, [LYON], comb=True, normalize=normalize, backend=backend).shape == (1, 0)
+    assert haversine_vector_columns([], [], [], [], normalize=normalize, backend=backend).shape == (0,)
+
+
+@pytest.mark.parametrize('backend', backends())
+def test_inverse_haversine_vector_backend(backend):
+    points = np.random.uniform(-45, 45, size=(20, 2))
+    distances, directions = np.random.uniform(0, 1000, size=(2, 20))
+    expected = inverse_haversine_vector(points, distances, directions, normalize_output=True, backend='numpy')
+
+    assert_allclose(inverse_haversine_vector(points, distances, directions, normalize_output=True, backend=backend),
+                    expected)
+
+    expected = inverse_haversine_vector(points, distances[:3], directions[:4], normalize_output=True, backend='numpy',
+                                        comb=True)
+    assert_allclose(inverse_haversine_vector(points, distances[:3], directions[:4], normalize_output=True,
+                                             backend=backend, comb=True), expected)
+
+
+def test_set_backend():
+    set_backend('numpy')
+    assert get_backend() == 'numpy'
+    # Scalar functions use the plain Python kernels of the numpy backend
+    assert not hasattr(import_module('haversine.haversine')._haversine_kernel, 'py_func')
+    assert haversine(LYON, PARIS) == pytest.approx(EXPECTED_LYON_PARIS[Unit.KILOMETERS])
+
+    set_backend('numpy_array_api')
+    assert get_backend() == 'numpy_array_api'
+    assert_allclose(haversine_vector([LYON, LYON], [PARIS, NEW_YORK]),
+                    [EXPECTED_LYON_PARIS[Unit.KILOMETERS], EXPECTED_LYON_NEW_YORK[Unit.KILOMETERS]])
+
+    set_backend(None)
+    assert get_backend() in ('numpy', 'numba')
+
+
+@pytest.mark.parametrize('size', [2, 200])
+def test_haversine_many_array_api_backend(size):
+    pairs = [(LYON, PARIS)] * size
+    set_backend('numpy_array_api')
+    # Pairs of tuples are computed whatever their number
+    assert haversine_many(pairs) == pytest.approx([EXPECTED_LYON_PARIS[Unit.KILOMETERS]] * size)
+    with use_backend('numpy_array_api'):
+        assert haversine_many(pairs) == pytest.approx([EXPECTED_LYON_PARIS[Unit.KILOMETERS]] * size)
+    with pytest.raises(ValueError):
+        haversine_many(pairs, backend='numpy_array_api')
+
+
+def test_use_backend():
+    default = get_backend()
+    with use_backend('numpy_array_api'):
+        assert get_backend() == 'numpy_array_api'
+        with use_backend('numpy'):
+            assert get_backend() == 'numpy'
+        assert get_backend() == 'numpy_array_api'
+    assert get_backend() == default
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        set_backend('fortran')
+    with pytest.raises(ValueError):
+        haversine_vector(LYON, PARIS, backend='fortran')
+    with pytest.raises(ValueError):
+        register_backend('numpy', np)
+
+
+def test_array_api_backend_unsupported():
+    points = np.random.uniform(-45, 45, size=(20, 2))
+    with pytest.raises(ValueError):
+        haversine_vector(points, points, out=np.empty(20), backend='numpy_array_api')
+    with pytest.raises(ValueError):
+        path_length(points, backend='numpy_array_api')
+    with use_backend('numpy_array_api'), pytest.raises(ValueError):
+        path_length(points)
+
+
+def test_array_api_strict():
+    xp = pytest.importorskip('array_api_strict')
+    points1 = np.random.uniform(-45, 45, size=(20, 2))
+    points2 = np.random.uniform(-45, 45, size=(20, 2))
+
+    distances = haversine_vector(xp.asarray(points1), xp.asarray(points2), comb=True, backend=xp)
+    assert get_backend() != xp.__name__
+    assert isinstance(distances, type(xp.asarray(0.0)))
+    assert_allclose(np.asarray(distances), haversine_vector(points1, points2, comb=True))
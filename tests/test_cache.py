@@ -0,0 +1,104 @@
+from haversine import DistanceMatrixCache, HaversineCache, haversine, haversine_vector, inverse_haversine, Direction, Unit
+from numpy.testing import assert_allclose
+import numpy as np
+import pytest
+
+from tests.geo_ressources import LYON, PARIS, NEW_YORK
+
+
+@pytest.fixture
+def points():
+    return np.random.uniform(-45, 45, size=(30, 2)), np.random.uniform(-45, 45, size=(20, 2))
+
+
+def test_matrix(points):
+    depots, customers = points
+    cache = DistanceMatrixCache()
+    matrix = cache.matrix(depots, customers, Unit.MILES)
+    assert_allclose(matrix, haversine_vector(depots, customers, Unit.MILES, comb=True))
+    assert not matrix.flags.writeable
+
+    assert cache.matrix(depots.tolist(), customers, 'mi') is matrix
+    assert cache.matrix(depots, customers) is not matrix
+    assert cache.info() == {'hits': 1, 'partial_hits': 0, 'misses': 2, 'entries': 2, 'bytes': 2 * (600 + 50 * 2) * 8}
+
+
+def test_matrix_appended_points(points):
+    depots, customers = points
+    cache = DistanceMatrixCache()
+    cache.matrix(depots, customers[:10])
+
+    # Only the distances of the new customers are computed, and the larger matrix replaces the cached one
+    matrix = cache.matrix(depots, customers)
+    assert_allclose(matrix, haversine_vector(depots, customers, comb=True))
+    assert cache.info()['partial_hits'] == 1
+    assert len(cache) == 1
+
+    # Both arrays grown or shrunk
+    more_depots = np.concatenate((depots, np.random.uniform(-45, 45, size=(5, 2))))
+    assert_allclose(cache.matrix(more_depots, customers[:15]), haversine_vector(more_depots, customers[:15], comb=True))
+    assert cache.info()['partial_hits'] == 2
+    assert len(cache) == 2
+
+    # First points of a cached matrix are a view of it
+    assert_allclose(cache.matrix(depots[:5], customers[:3]), matrix[:3, :5])
+    assert cache.info()['hits'] == 1
+
+
+def test_matrix_check(points):
+    depots, customers = points
+    cache = DistanceMatrixCache()
+    cache.matrix(depots, customers[:10])
+    with pytest.raises(ValueError):
+        cache.matrix(depots, np.concatenate((customers, [[100, 0]])))
+    assert_allclose(cache.matrix(depots, [[100, 0]], normalize=True), haversine_vector(depots, [[80, 180]], comb=True))
+
+
+def test_eviction(points):
+    depots, customers = points
+    matrix_bytes = (600 + 50 * 2) * 8
+    cache = DistanceMatrixCache(max_bytes=2 * matrix_bytes)
+    cache.matrix(depots, customers)
+    cache.matrix(depots[::-1], customers)
+    cache.matrix(depots, customers)
+    cache.matrix(depots, customers[::-1])
+    # The least recently used matrix was evicted
+    assert cache.info() == {'hits': 1, 'partial_hits': 0, 'misses': 3, 'entries': 2, 'bytes': 2 * matrix_bytes}
+    cache.matrix(depots, customers)
+    assert cache.info()['hits'] == 2
+
+    # The larger matrix replaces the one it holds, and evicts the other one
+    cache.matrix(np.concatenate((depots, depots)), customers[::-1])
+    assert cache.info()['partial_hits'] == 1
+    assert len(cache) == 1
+
+    cache.clear()
+    assert cache.info() == {'hits': 0, 'partial_hits': 0, 'misses': 0, 'entries': 0, 'bytes': 0}
+    cache.max_bytes = matrix_bytes - 1
+    cache.matrix(depots, customers)
+    assert len(cache) == 0
+
+
+def test_haversine_cache():
+    cache = HaversineCache(maxsize=2)
+    assert cache.haversine(LYON, PARIS, Unit.MILES) == haversine(LYON, PARIS, Unit.MILES)
+    assert cache.haversine(list(LYON), PARIS, Unit.MILES) == haversine(LYON, PARIS, Unit.MILES)
+    assert cache.haversine(LYON, NEW_YORK) == haversine(LYON, NEW_YORK)
+    assert cache.inverse_haversine(PARIS, 100, Direction.NORTH) == inverse_haversine(PARIS, 100, Direction.NORTH)
+    with pytest.raises(ValueError):
+        cache.haversine(LYON, (100, 0))
+
+    info = cache.info()
+    assert info['haversine'] == {'hits': 1, 'misses': 3, 'hit_rate': 0.25, 'size': 2, 'maxsize': 2}
+    assert info['inverse_haversine'] == {'hits': 0, 'misses': 1, 'hit_rate': 0.0, 'size': 1, 'maxsize': 2}
+
+    cache.clear()
+    assert cache.info()['haversine'] == {'hits': 0, 'misses': 0, 'hit_rate': 0.0, 'size': 0, 'maxsize': 2}
+
+
+def test_haversine_cache_decimals():
+    cache = HaversineCache(decimals=3)
+    assert cache.haversine((45.76001, 4.84201), PARIS) == haversine((45.76, 4.842), (48.857, 2.351))
+    assert cache.haversine((45.75999, 4.84199), PARIS) == haversine((45.76, 4.842), (48.857, 2.351))
+    assert cache.inverse_haversine((48.85671, 2.35079), 10, 0) == inverse_haversine((48.857, 2.351), 10, 0)
+    assert cache.info()['haversine']['hits'] == 1
@@ -0,0 +1,64 @@
+from haversine import HaversineGrid, haversine_vector, pairs_within, Unit
+from numpy.testing import assert_array_equal
+import numpy as np
+import pytest
+
+from tests.geo_ressources import LYON, PARIS, NEW_YORK, LONDON
+
+
+def test_join():
+    grid = HaversineGrid([LYON, PARIS, NEW_YORK, LONDON], cell_size=5)
+    i, j = grid.join([PARIS, LONDON], 400, Unit.KILOMETERS)
+
+    assert_array_equal(i, [0, 1, 1, 3, 3])
+    assert_array_equal(j, [0, 0, 1, 0, 1])
+
+
+@pytest.mark.parametrize('cell_size', [0.05, 0.3, 2, 45])
+@pytest.mark.parametrize('region', [(40, 50, 0, 10), (85, 90, -180, 180), (-10, 10, 175, 180)])
+def test_join_random(cell_size, region):
+    lat_lo, lat_hi, lng_lo, lng_hi = region
+    points1, points2 = (np.column_stack((np.random.uniform(lat_lo, lat_hi, n), np.random.uniform(lng_lo, lng_hi, n)))
+                        for n in (300, 200))
+    # Wrap half of the points around the antimeridian
+    points2[::2, 1] = np.where(points2[::2, 1] > 0, points2[::2, 1] - 180, points2[::2, 1])
+
+    i, j = HaversineGrid(points1, cell_size).join(points2, 50, Unit.KILOMETERS)
+    expected_i, expected_j, _ = pairs_within(points1, points2, 50, Unit.KILOMETERS)
+    assert_array_equal(i, expected_i)
+    assert_array_equal(j, expected_j)
+
+
+def test_join_max_memory():
+    points = np.random.uniform(40, 50, size=(300, 2))
+    grid = HaversineGrid(points, 0.5)
+    i, j = grid.join(grid, 100, max_memory=1000)
+    expected_i, expected_j, _ = pairs_within(points, points, 100)
+    assert_array_equal(i, expected_i)
+    assert_array_equal(j, expected_j)
+
+
+def cell_indices(grid, points):
+    # Index in grid.cells of the cell holding each point, for cell sizes dividing 180
+    centres = (points + [90, 180]) // grid.cell_size * grid.cell_size - [90, 180] + grid.cell_size / 2
+    return np.array([np.flatnonzero(np.all(np.isclose(grid.cells, centre), axis=1))[0] for centre in centres])
+
+
+def test_distance_bounds():
+    points1 = np.random.uniform(-89, 89, size=(300, 2))
+    points2 = np.random.uniform(-89, 89, size=(200, 2))
+    grid1, grid2 = HaversineGrid(points1, 10), HaversineGrid(points2, 4)
+    lower, upper = grid1.distance_bounds(grid2, Unit.MILES)
+    assert lower.shape == upper.shape == (len(grid1.cells), len(grid2.cells))
+
+    cells1, cells2 = cell_indices(grid1, points1), cell_indices(grid2, points2)
+    distances = haversine_vector(points2, points1, Unit.MILES, comb=True)
+    assert np.all(lower[cells1[:, None], cells2] <= distances)
+    assert np.all(distances <= upper[cells1[:, None], cells2])
+
+
+def test_cell_size_out_of_range():
+    with pytest.raises(ValueError):
+        HaversineGrid([LYON], 0)
+    with pytest.raises(ValueError):
+        HaversineGrid([LYON], 100)
@@ -1,5 +1,5 @@
-from haversine import haversine, Unit
-from math import pi
+from haversine import haversine, Precision, Unit
+from math import pi, radians
 import pytest
 
 from tests.geo_ressources import LYON, PARIS, NEW_YORK, LONDON, EXPECTED_LYON_PARIS
@@ -105,3 +105,18 @@ def test_haversine_deg_rad_great_circle_distance():
     """
     p1, p2 = (0, -45), (0, 45)
     assert haversine(p1, p2, Unit.DEGREES) == 89.99999999999997
+
+
+@pytest.mark.parametrize('delta', [1e-3, 1e-5, 1e-7])
+def test_haversine_precision(delta):
+    # On the equator, the angle between the points is their difference of longitude
+    point1, point2 = (0, 0), (0, 180 - delta)
+    expected = radians(180 - delta)
+    assert haversine(point1, point2, Unit.RADIANS, precision=Precision.ACCURATE) == pytest.approx(expected, abs=1e-15)
+    assert haversine(point1, point2, Unit.RADIANS, precision='hybrid') == pytest.approx(expected, abs=1e-15)
+    assert haversine(point1, point2, Unit.RADIANS) == pytest.approx(expected, abs=1e-8)
+    # Points far from antipodes are computed as with the fast kernel
+    assert haversine(LYON, PARIS, precision='hybrid') == haversine(LYON, PARIS)
+    assert haversine(LYON, PARIS, precision='accurate') == pytest.approx(EXPECTED_LYON_PARIS[Unit.KILOMETERS])
+    with pytest.raises(ValueError):
+        haversine(LYON, PARIS, precision='exact')
@@ -0,0 +1,54 @@
+from importlib import import_module
+from haversine import haversine, haversine_many, Unit
+import pytest
+
+from tests.geo_ressources import LYON, PARIS, NEW_YORK, LONDON, EXPECTED_LYON_PARIS, EXPECTED_LYON_NEW_YORK
+
+
+@pytest.fixture(params=[False, True], ids=['python', 'numpy'])
+def vectorized(request, monkeypatch):
+    monkeypatch.setattr(import_module('haversine.haversine'), '_MANY_VECTOR_MIN_SIZE', 1 if request.param else 10 ** 9)
+    return request.param
+
+
+def test_haversine_many(vectorized):
+    assert haversine_many([(LYON, PARIS), (LYON, NEW_YORK)]) == pytest.approx(
+        [EXPECTED_LYON_PARIS[Unit.KILOMETERS], EXPECTED_LYON_NEW_YORK[Unit.KILOMETERS]])
+    assert haversine_many(iter([(LYON, PARIS)]), 'mi') == pytest.approx([EXPECTED_LYON_PARIS[Unit.MILES]])
+    assert haversine_many([]) == []
+
+
+def test_haversine_many_matches_haversine():
+    points = [LYON, PARIS, NEW_YORK, LONDON] * 100
+    pairs = list(zip(points, points[1:]))
+    assert haversine_many(pairs, Unit.FEET) == pytest.approx([haversine(p1, p2, Unit.FEET) for p1, p2 in pairs])
+
+
+@pytest.mark.parametrize(
+    "oob_from,oob_to,proper_from,proper_to", [
+        ((-90.0001, 30), (0, 0), (-89.9999, -150), (0, 0)),
+        ((0, 0), (30, 180.0001), (0, 0), (30, -179.9999)),
+    ]
+)
+def test_haversine_many_normalization(vectorized, oob_from, oob_to, proper_from, proper_to):
+    with pytest.raises(ValueError):
+        haversine_many([(oob_from, oob_to)])
+    assert haversine_many([(oob_from, oob_to)], normalize=True) == pytest.approx(
+        haversine_many([(proper_from, proper_to)]), abs=1e-10)
+
+
+@pytest.mark.parametrize('normalize,check', [(False, True), (False, False), (True, True)])
+def test_haversine_many_malformed(vectorized, normalize, check):
+    # A point with 3 coordinates must not shift the coordinates of the following pairs
+    pairs = [(LYON, PARIS)] * 200
+    pairs[10] = ((45, 4, 1), PARIS)
+    with pytest.raises(ValueError, match='pairs must be pairs'):
+        haversine_many(pairs, normalize=normalize, check=check)
+    pairs[10] = (LYON, PARIS, LONDON)
+    with pytest.raises(ValueError, match='pairs must be pairs'):
+        haversine_many(pairs, normalize=normalize, check=check)
+    # Other errors are left as is
+    pairs[10] = ((91, 0), PARIS)
+    if check and not normalize:
+        with pytest.raises(ValueError, match='Latitude'):
+            haversine_many(pairs, normalize=normalize, check=check)
@@ -0,0 +1,40 @@
+from haversine import haversine, haversine_pdist, haversine_vector, PreparedPoints, Unit
+from numpy.testing import assert_allclose
+import numpy as np
+import pytest
+
+from tests.geo_ressources import LYON, PARIS, NEW_YORK, LONDON
+
+
+def test_haversine_pdist():
+    points = [LYON, PARIS, NEW_YORK, LONDON]
+    expected = [haversine(p1, p2, Unit.MILES) for i, p1 in enumerate(points) for p2 in points[i + 1:]]
+
+    assert_allclose(haversine_pdist(points, Unit.MILES), expected)
+    assert_allclose(haversine_pdist(PreparedPoints(points), Unit.MILES), expected)
+
+
+def test_haversine_pdist_matches_comb():
+    points = np.random.uniform(-45, 45, size=(30, 2))
+    matrix = haversine_vector(points, points, comb=True)
+
+    out = np.empty(30 * 29 // 2)
+    assert haversine_pdist(points, out=out) is out
+    assert_allclose(out, matrix[np.triu_indices(30, k=1)])
+
+
+def test_haversine_pdist_scipy_layout():
+    distance = pytest.importorskip('scipy.spatial.distance')
+    points = np.random.uniform(-45, 45, size=(30, 2))
+    condensed = haversine_pdist(points)
+
+    assert_allclose(distance.squareform(condensed), haversine_vector(points, points, comb=True), atol=1e-9)
+
+
+def test_haversine_pdist_single_point():
+    assert haversine_pdist([LYON]).shape == (0,)
+
+
+def test_haversine_pdist_out_of_bounds():
+    with pytest.raises(ValueError):
+        haversine_pdist([(0, 0), (90.0001, 0)])
@@ -0,0 +1,53 @@
+from haversine import haversine_many, haversine_stream, Unit
+from numpy.testing import assert_allclose
+import numpy as np
+import pytest
+
+
+def random_pairs(n):
+    points = np.random.uniform(-60, 60, size=(n, 4))
+    return [((a, b), (c, d)) for a, b, c, d in points.tolist()]
+
+
+@pytest.mark.parametrize(
+    'n,chunk_size', [(0, 10), (5, 10), (10, 10), (35, 10)]
+)
+def test_haversine_stream(n, chunk_size):
+    pairs = random_pairs(n)
+    chunks = [chunk.copy() for chunk in haversine_stream(iter(pairs), Unit.MILES, chunk_size=chunk_size)]
+
+    assert [len(chunk) for chunk in chunks] == [min(chunk_size, n - start) for start in range(0, n, chunk_size)]
+    assert_allclose(np.concatenate([np.empty(0)] + chunks), haversine_many(pairs, Unit.MILES))
+
+
+def test_haversine_stream_reuses_buffer():
+    chunks = list(haversine_stream(random_pairs(30), chunk_size=10))
+    assert all(np.shares_memory(chunks[0], chunk) for chunk in chunks)
+
+
+def test_haversine_stream_normalization():
+    pairs = [((-90.0001, 30), (0, 0)), ((0, 0), (30, 180.0001))]
+    with pytest.raises(ValueError):
+        next(haversine_stream(pairs))
+    assert_allclose(next(haversine_stream(pairs, normalize=True)),
+                    haversine_many([((-89.9999, -150), (0, 0)), ((0, 0), (30, -179.9999))]))
+
+
+def test_haversine_stream_malformed():
+    # A point with 3 coordinates must not shift the coordinates of the following pairs
+    pairs = random_pairs(30)
+    pairs[15] = ((10, 20, 30), (0, 0))
+    stream = haversine_stream(pairs, chunk_size=10)
+    assert_allclose(next(stream), haversine_many(pairs[:10]))
+    with pytest.raises(ValueError):
+        next(stream)
+    # Nor must a point with 3 coordinates followed by one with 1
+    pairs[16] = ((10,), (0, 0))
+    with pytest.raises(ValueError):
+        list(haversine_stream(pairs, chunk_size=10))
+
+
+@pytest.mark.parametrize('chunk_size', [0, -1])
+def test_haversine_stream_invalid_chunk_size(chunk_size):
+    with pytest.raises(ValueError):
+        next(haversine_stream(random_pairs(5), chunk_size=chunk_size))
@@ -1,5 +1,7 @@
-from haversine import haversine_vector, Unit
+from importlib import import_module
+from haversine import haversine, haversine_vector, haversine_vector_blocks, Precision, PreparedPoints, Unit, warmup
 from numpy.testing import assert_allclose
+import numpy as np
 import pytest
 
 from tests.geo_ressources import EXPECTED_LONDON_PARIS, EXPECTED_LYON_NEW_YORK, EXPECTED_LYON_PARIS, EXPECTED_LONDON_NEW_YORK, LYON, PARIS, NEW_YORK, LONDON
@@ -78,6 +80,237 @@ def test_haversine_vector_comb():
     )
 
 
+@pytest.mark.parametrize(
+    'max_memory', [None, 1, 1000, 10 ** 9]
+)
+def test_haversine_vector_comb_out(max_memory):
+    points1 = np.random.uniform(-45, 45, size=(50, 2))
+    points2 = np.random.uniform(-45, 45, size=(70, 2))
+    expected = haversine_vector(points1, points2, comb=True)
+
+    out = np.empty((70, 50))
+    result = haversine_vector(points1, points2, comb=True, out=out, max_memory=max_memory)
+    assert result is out
+    assert_allclose(out, expected)
+
+    assert_allclose(haversine_vector(points1, points2, comb=True, max_memory=max_memory), expected)
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_haversine_vector_out(dtype):
+    points1 = np.random.uniform(-45, 45, size=(50, 2))
+    points2 = np.random.uniform(-45, 45, size=(50, 2))
+    out = np.empty(50, dtype=dtype)
+    assert haversine_vector(points1, points2, out=out) is out
+    assert_allclose(out, haversine_vector(points1, points2), rtol=1e-6)
+
+
+def test_haversine_vector_comb_out_shape():
+    with pytest.raises(ValueError):
+        haversine_vector([LYON, LONDON], [PARIS], comb=True, out=np.empty((2, 1)))
+
+
+def test_haversine_vector_blocks():
+    points1 = np.random.uniform(-45, 45, size=(50, 2))
+    points2 = np.random.uniform(-45, 45, size=(70, 2))
+    expected = haversine_vector(points1, points2, Unit.MILES, comb=True)
+
+    blocks = list(haversine_vector_blocks(points1, points2, Unit.MILES, max_memory=50 * 48 * 16))
+    assert [start for start, _ in blocks] == list(range(0, 70, 16))
+    assert_allclose(np.concatenate([block for _, block in blocks]), expected)
+
+
 def test_units_enum():
     from haversine.haversine import _CONVERSIONS
     assert all(unit in _CONVERSIONS for unit in Unit)
+
+
+@pytest.mark.parametrize(
+    'comb', [False, True]
+)
+def test_haversine_vector_prepared_points(comb):
+    points1 = np.random.uniform(-45, 45, size=(50, 2))
+    points2 = np.random.uniform(-45, 45, size=(50, 2))
+    expected = haversine_vector(points1, points2, Unit.MILES, comb=comb)
+
+    prepared1, prepared2 = PreparedPoints(points1), PreparedPoints(points2)
+    assert len(prepared1) == 50
+    assert_allclose(haversine_vector(prepared1, prepared2, Unit.MILES, comb=comb), expected)
+    assert_allclose(haversine_vector(points1, prepared2, Unit.MILES, comb=comb), expected)
+    assert_allclose(haversine_vector(prepared1, points2, Unit.MILES, comb=comb), expected)
+
+
+def test_prepared_points_out_of_bounds():
+    with pytest.raises(ValueError):
+        PreparedPoints([(0, 0), (90.0001, 0)])
+    prepared = PreparedPoints([(0, 0), (90.0001, 0)], normalize=True)
+    assert_allclose(haversine_vector(prepared, [(0, 0), (89.9999, -180)]), [0, 0], atol=1e-6)
+
+
+@pytest.mark.parametrize(
+    'comb,max_memory', [(False, None), (True, None), (True, 1000)]
+)
+def test_haversine_vector_workers(comb, max_memory, monkeypatch):
+    monkeypatch.setattr(import_module('haversine.haversine'), '_PARALLEL_MIN_SIZE', 10)
+    points1 = np.random.uniform(-45, 45, size=(50, 2))
+    points2 = np.random.uniform(-45, 45, size=(50, 2))
+    expected = haversine_vector(points1, points2, comb=comb)
+
+    assert_allclose(haversine_vector(points1, points2, comb=comb, max_memory=max_memory, workers=3), expected)
+    assert_allclose(haversine_vector(points1, points2, comb=comb, max_memory=max_memory, workers=-1), expected)
+    with pytest.raises(ValueError):
+        haversine_vector(points1, points2, comb=comb, workers=0)
+
+
+@pytest.mark.parametrize('workers', [0, -5])
+def test_haversine_vector_invalid_workers(workers):
+    # Invalid values are rejected even for inputs too small to be shared between threads
+    with pytest.raises(ValueError):
+        haversine_vector([LYON], [PARIS], workers=workers)
+    with pytest.raises(ValueError):
+        haversine_vector([LYON], [PARIS], comb=True, workers=workers)
+
+
+@pytest.mark.parametrize(
+    'comb', [False, True]
+)
+def test_haversine_vector_float32(comb):
+    points1 = np.random.uniform(-45, 45, size=(50, 2))
+    points2 = np.random.uniform(-45, 45, size=(50, 2))
+    expected = haversine_vector(points1, points2, Unit.METERS, comb=comb)
+
+    result = haversine_vector(points1, points2, Unit.METERS, comb=comb, dtype=np.float32)
+    assert result.dtype == np.float32
+    assert_allclose(result, expected, atol=5)
+
+    prepared = PreparedPoints(points2, dtype=np.float32)
+    assert prepared.lat.dtype == np.float32
+    assert_allclose(haversine_vector(points1, prepared, Unit.METERS, comb=comb, dtype=np.float32), expected, atol=5)
+
+
+@pytest.mark.parametrize('points_dtype', [np.float32, np.float64, np.int64])
+@pytest.mark.parametrize('comb', [False, True])
+def test_haversine_vector_result_dtype(points_dtype, comb, monkeypatch):
+    monkeypatch.setattr(import_module('haversine.haversine'), '_PARALLEL_MIN_SIZE', 10)
+    points = np.random.uniform(-45, 45, size=(20, 2)).astype(points_dtype)
+    expected = haversine_vector(points, points, comb=comb).dtype
+    assert expected == (np.float32 if points_dtype == np.float32 else np.float64)
+
+    # Results computed by blocks or threads have the type of the ones computed at once
+    assert haversine_vector(points, points, comb=comb, max_memory=1000).dtype == expected
+    assert haversine_vector(points, points, comb=comb, workers=2).dtype == expected
+    assert haversine_vector(PreparedPoints(points), points, comb=comb, max_memory=1000).dtype == expected
+
+
+def test_haversine_vector_float32_error():
+    rng = np.random.default_rng(0)
+    points1, points2 = (np.column_stack((rng.uniform(-90, 90, 20000), rng.uniform(-180, 180, 20000)))
+                        for _ in range(2))
+    expected = haversine_vector(points1, points2, Unit.METERS, precision=Precision.ACCURATE)
+
+    # Errors of the default precision grow towards antipodes, as documented
+    errors = np.abs(haversine_vector(points1, points2, Unit.METERS, dtype=np.float32) - expected)
+    assert errors[expected < 15_000_000].max() < 6
+    assert errors[expected < 19_000_000].max() < 25
+    errors = np.abs(haversine_vector(points1, points2, Unit.METERS, dtype=np.float32, precision=Precision.ACCURATE)
+                    - expected)
+    assert errors.max() < 6
+
+
+def test_haversine_vector_normalize_inplace():
+    points1 = np.array([(-90.0001, 30), (0, -180.0001)])
+    points2 = np.array([(0, 0), (30, 180.0001)])
+    expected = haversine_vector(points1, points2, normalize=True)
+
+    assert_allclose(haversine_vector(points1, points2, normalize=True, inplace=True), expected)
+    assert_allclose(points1, [(-89.9999, -150), (0, 179.9999)])
+    assert_allclose(points2, [(0, 0), (30, -179.9999)])
+
+    with pytest.raises(TypeError):
+        haversine_vector(np.array([(0, 0)]), np.array([(0, 0)]), normalize=True, inplace=True)
+
+
+def test_normalize_vector_chunks(monkeypatch):
+    module = import_module('haversine.haversine')
+    monkeypatch.setattr(module, '_VECTOR_CHUNK_SIZE', 7)
+    lat, lon = np.random.uniform(-1000, 1000, size=(2, 100))
+
+    out_lat, out_lon = np.empty(100), np.empty(100)
+    module._normalize_vector_chunks(lat, lon, out_lat, out_lon)
+    expected = np.array([module._normalize(*point) for point in zip(lat, lon)])
+    assert_allclose(out_lat, expected[:, 0], atol=1e-10)
+    assert_allclose((out_lon - expected[:, 1] + 180) % 360 - 180, 0, atol=1e-10)
+
+    assert module._lat_lon_out_of_range_chunks(out_lat, out_lon) == 0
+    out_lon[50] = 180.5
+    assert module._lat_lon_out_of_range_chunks(out_lat, out_lon) == 2
+    out_lat[99] = -90.5
+    assert module._lat_lon_out_of_range_chunks(out_lat, out_lon) == 1
+
+
+@pytest.mark.parametrize(
+    'comb', [False, True]
+)
+def test_haversine_vector_memmap(comb, tmp_path, monkeypatch):
+    points1 = np.lib.format.open_memmap(tmp_path / 'points1.npy', mode='w+', shape=(60, 2))
+    points2 = np.lib.format.open_memmap(tmp_path / 'points2.npy', mode='w+', shape=(60, 2))
+    points1[:] = np.random.uniform(-45, 45, size=(60, 2))
+    points2[:] = np.random.uniform(-45, 45, size=(60, 2))
+    expected = haversine_vector(np.array(points1), np.array(points2), comb=comb)
+
+    module = import_module('haversine.haversine')
+    assert np.shares_memory(module._as_points_array(points1), points1)
+    # Make the default block size small enough to write the result in several blocks
+    monkeypatch.setattr(module, '_DEFAULT_MAX_MEMORY', 1000)
+    blocks = []
+    monkeypatch.setattr(module, '_map_ranges', lambda func, n, step, workers: blocks.append(step) or
+                        [func(start, min(start + step, n)) for start in range(0, n, step)])
+
+    out = np.lib.format.open_memmap(tmp_path / 'out.npy', mode='w+', shape=expected.shape)
+    haversine_vector(points1, points2, comb=comb, out=out)
+    out.flush()
+    assert blocks[0] < 60
+    assert_allclose(np.load(tmp_path / 'out.npy'), expected)
+
+
+def test_haversine_vector_max_memory():
+    points1 = np.random.uniform(-45, 45, size=(50, 2))
+    points2 = np.random.uniform(-45, 45, size=(50, 2))
+    assert_allclose(haversine_vector(points1, points2, max_memory=1000), haversine_vector(points1, points2))
+
+
+def test_warmup():
+    warmup()
+    kernel = import_module('haversine.haversine')._get_backend().haversine_kernel_vector
+    if isinstance(kernel, np.ufunc):
+        # numba ufuncs are compiled for both precisions, integers are cast to double precision
+        assert {'ffff->f', 'dddd->d'} <= set(kernel.types)
+    points = np.array([[0, 0], [1, 1]])
+    assert_allclose(haversine_vector(points, points[::-1]), haversine_vector(points.astype(float), points[::-1]))
+    backend = import_module('haversine.haversine')._get_backend()
+    for inverse_kernel in (backend.inverse_haversine_kernel_vector, backend.inverse_haversine_into):
+        if hasattr(inverse_kernel, 'signatures'):
+            # numba kernels are compiled for both precisions, double precision being the common case
+            assert {str(signature[0].dtype) for signature in inverse_kernel.signatures} >= {'float64', 'float32'}
+
+
+@pytest.mark.parametrize('precision', list(Precision))
+@pytest.mark.parametrize('comb', [False, True])
+def test_haversine_vector_precision(precision, comb):
+    points1 = np.random.uniform(-45, 45, size=(20, 2))
+    # Nearly antipodal points, along with the opposite points
+    points2 = np.column_stack((-points1[:, 0], points1[:, 1] - np.copysign(180 - 1e-5, points1[:, 1])))
+    points2[::2] = -points1[::2]
+    expected = [[haversine(point1, point2, precision=precision) for point1 in points1] for point2 in points2]
+    if not comb:
+        expected = np.diagonal(expected)
+
+    # The fast kernel loses precision near antipodes, where its results depend on rounding
+    rtol = 1e-8 if precision is Precision.FAST else 1e-14
+    assert_allclose(haversine_vector(points1, points2, comb=comb, precision=precision), expected, rtol=rtol)
+    if precision is not Precision.FAST:
+        # In single precision, d may round above 1 near antipodes, for which the fast kernel returns NaN
+        assert_allclose(haversine_vector(points1, points2, comb=comb, precision=precision.value, dtype=np.float32),
+                        expected, rtol=1e-5)
+        with pytest.raises(ValueError):
+            haversine_vector(PreparedPoints(points1), points2, comb=comb, precision=precision)
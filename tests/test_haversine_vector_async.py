@@ -0,0 +1,108 @@
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+import asyncio
+import gc
+
+from haversine import (haversine_vector, inverse_haversine_vector, haversine_vector_async,
+                       inverse_haversine_vector_async, enable_stats, disable_stats, reset_stats, stats, Unit)
+from numpy.testing import assert_allclose
+import numpy as np
+import pytest
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+@pytest.fixture
+def recorded_stats():
+    reset_stats()
+    enable_stats()
+    yield stats
+    disable_stats()
+    reset_stats()
+
+
+def test_haversine_vector_async():
+    points1 = np.random.uniform(-45, 45, size=(20, 2))
+    points2 = np.random.uniform(-45, 45, size=(20, 2))
+
+    assert_allclose(asyncio.run(haversine_vector_async(points1, points2, Unit.MILES)),
+                    haversine_vector(points1, points2, Unit.MILES))
+    assert_allclose(asyncio.run(haversine_vector_async(points1, points2, comb=True)),
+                    haversine_vector(points1, points2, comb=True))
+
+
+def test_haversine_vector_async_batching(recorded_stats):
+    requests = [np.random.uniform(-45, 45, size=(n, 2)) for n in range(1, 11)]
+
+    async def main():
+        return await asyncio.gather(*(haversine_vector_async(points, points[::-1]) for points in requests))
+
+    results = asyncio.run(main())
+    # Concurrent requests are computed with a single call
+    assert recorded_stats()['functions']['haversine_vector']['calls'] == 1
+    assert recorded_stats()['functions']['haversine_vector']['elements'] == 55
+    for points, result in zip(requests, results):
+        assert_allclose(result, haversine_vector(points, points[::-1]))
+
+
+def test_haversine_vector_async_loops_released():
+    batchers = import_module('haversine.aio')._batchers
+    points = np.random.uniform(-45, 45, size=(20, 2))
+    for _ in range(5):
+        asyncio.run(haversine_vector_async(points, points))
+    gc.collect()
+    assert len(batchers) == 0
+
+
+def test_haversine_vector_async_batch_error():
+    points = np.random.uniform(-45, 45, size=(5, 2))
+
+    async def main():
+        return await asyncio.gather(haversine_vector_async(points, points), haversine_vector_async(points + 360, points),
+                                    haversine_vector_async(points, points[:4]), return_exceptions=True)
+
+    result, out_of_range, mismatching = asyncio.run(main())
+    # Failing requests do not fail the others of the batch
+    assert_allclose(result, np.zeros(5), atol=1e-9)
+    assert isinstance(out_of_range, ValueError)
+    assert isinstance(mismatching, IndexError)
+
+
+def test_haversine_vector_async_offload(monkeypatch):
+    monkeypatch.setattr('haversine.aio._ASYNC_OFFLOAD_MIN_SIZE', 100)
+    points = np.random.uniform(-45, 45, size=(200, 2))
+
+    async def main(executor):
+        return await asyncio.gather(haversine_vector_async(points, points[::-1], executor=executor),
+                                    haversine_vector_async(points[:10], points[:10], comb=True, executor=executor),
+                                    *(haversine_vector_async(points[:20], points[:20], executor=executor)
+                                      for _ in range(5)))
+
+    with CountingExecutor(1) as executor:
+        large, comb, *batched = asyncio.run(main(executor))
+    # The large request, the large combination and the batch of small requests
+    assert executor.submitted == 3
+    assert_allclose(large, haversine_vector(points, points[::-1]))
+    assert_allclose(comb, haversine_vector(points[:10], points[:10], comb=True))
+    assert_allclose(batched, np.zeros((5, 20)), atol=1e-9)
+
+
+def test_inverse_haversine_vector_async():
+    points = np.random.uniform(-45, 45, size=(20, 2))
+    distances, directions = np.random.uniform(0, 1000, size=(2, 20))
+
+    async def main():
+        return await asyncio.gather(inverse_haversine_vector_async(points, distances, directions),
+                                    inverse_haversine_vector_async(points[:5], distances[:5], directions[:5]),
+                                    inverse_haversine_vector_async(points, distances[:3], directions[:4], comb=True))
+
+    result, batched, comb = asyncio.run(main())
+    assert_allclose(result, inverse_haversine_vector(points, distances, directions))
+    assert_allclose(batched, inverse_haversine_vector(points[:5], distances[:5], directions[:5]))
+    assert_allclose(comb, inverse_haversine_vector(points, distances[:3], directions[:4], comb=True))
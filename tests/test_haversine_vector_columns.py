@@ -0,0 +1,52 @@
+from importlib import import_module
+from haversine import haversine_vector, haversine_vector_columns, Unit
+from numpy.testing import assert_allclose
+import numpy as np
+import pytest
+
+
+class ColumnLike:
+    """Minimal object exposing its data through __array__, as pandas or Arrow columns do."""
+
+    def __init__(self, values):
+        self.values = values
+
+    def __array__(self, dtype=None, copy=None):
+        return self.values
+
+
+@pytest.mark.parametrize(
+    'comb', [False, True]
+)
+def test_haversine_vector_columns(comb):
+    points1 = np.random.uniform(-45, 45, size=(50, 2))
+    points2 = np.random.uniform(-45, 45, size=(50, 2))
+    expected = haversine_vector(points1, points2, Unit.MILES, comb=comb)
+
+    lat1, lng1 = np.ascontiguousarray(points1.T)
+    lat2, lng2 = np.ascontiguousarray(points2.T)
+    assert_allclose(haversine_vector_columns(lat1, lng1, lat2, lng2, Unit.MILES, comb=comb), expected)
+    assert_allclose(haversine_vector_columns(ColumnLike(lat1), ColumnLike(lng1), list(lat2), list(lng2),
+                                             Unit.MILES, comb=comb), expected)
+
+
+def test_haversine_vector_columns_no_copy(monkeypatch):
+    lat, lng = np.random.uniform(-45, 45, size=(2, 50))
+    seen = []
+    monkeypatch.setattr(import_module('haversine.haversine'), '_ensure_lat_lon_vector', lambda lat, lng, backend: seen.extend((lat, lng)))
+
+    haversine_vector_columns(ColumnLike(lat), ColumnLike(lng), lat, lng)
+    assert all(np.shares_memory(a, b) for a, b in zip(seen, (lat, lng, lat, lng)))
+
+
+def test_haversine_vector_columns_size_mismatch():
+    with pytest.raises(IndexError):
+        haversine_vector_columns([0, 1], [0, 1], [0], [0])
+    with pytest.raises(IndexError):
+        haversine_vector_columns([0, 1], [0], [0, 1], [0, 1], comb=True)
+
+
+def test_haversine_vector_columns_normalization():
+    assert_allclose(haversine_vector_columns([90.0001], [30], [89.9999], [-150], normalize=True), [0], atol=1e-6)
+    with pytest.raises(ValueError):
+        haversine_vector_columns([90.0001], [30], [89.9999], [-150])
@@ -0,0 +1,76 @@
+from haversine import HaversineIndex, haversine, haversine_vector, Unit
+from haversine import index as index_module
+from numpy.testing import assert_allclose, assert_array_equal
+import numpy as np
+import pytest
+
+from tests.geo_ressources import LYON, PARIS, NEW_YORK, LONDON
+
+
+@pytest.fixture(params=[True, False], ids=['kdtree', 'brute-force'])
+def use_kdtree(request, monkeypatch):
+    if request.param:
+        pytest.importorskip('scipy')
+    else:
+        monkeypatch.setattr(index_module, '_load_kdtree', lambda: None)
+    return request.param
+
+
+def test_query_knn(use_kdtree):
+    index = HaversineIndex([LYON, PARIS, NEW_YORK, LONDON])
+    distances, indices = index.query_knn([PARIS, NEW_YORK], k=2, unit=Unit.MILES)
+
+    assert_array_equal(indices, [[1, 3], [2, 3]])
+    assert distances[0, 0] == 0
+    assert distances[0, 1] == pytest.approx(haversine(PARIS, LONDON, unit=Unit.MILES))
+    assert distances[1, 1] == pytest.approx(haversine(NEW_YORK, LONDON, unit=Unit.MILES))
+
+
+def test_query_knn_random(use_kdtree):
+    points = np.random.uniform(-60, 60, size=(500, 2))
+    queries = np.random.uniform(-60, 60, size=(20, 2))
+    index = HaversineIndex(points)
+
+    distances, indices = index.query_knn(queries, k=5)
+    expected = haversine_vector(points, queries, comb=True)
+    assert_allclose(distances, np.sort(expected, axis=1)[:, :5])
+    assert_allclose(np.take_along_axis(expected, indices, axis=1), distances)
+
+
+def test_query_distances_are_the_ones_of_haversine(use_kdtree):
+    points = np.random.uniform(-60, 60, size=(500, 2))
+    queries = np.random.uniform(-60, 60, size=(20, 2))
+    index = HaversineIndex(points)
+
+    distances, indices = index.query_knn(queries, k=5)
+    for query, d, i in zip(queries, distances, indices):
+        assert list(d) == [haversine(query, points[j]) for j in i]
+
+    distances, indices = index.query_radius(queries, 1500)
+    for query, d, i in zip(queries, distances, indices):
+        assert list(d) == [haversine(query, points[j]) for j in i]
+
+
+def test_query_knn_k_out_of_range():
+    with pytest.raises(ValueError):
+        HaversineIndex([LYON, PARIS]).query_knn(LONDON, k=3)
+
+
+def test_query_radius(use_kdtree):
+    index = HaversineIndex([LYON, PARIS, NEW_YORK, LONDON])
+    distances, indices = index.query_radius([PARIS, NEW_YORK], 400)
+
+    assert [list(i) for i in indices] == [[1, 3, 0], [2]]
+    assert_allclose(distances[0], [0, haversine(PARIS, LONDON), haversine(PARIS, LYON)])
+
+
+def test_query_radius_random(use_kdtree):
+    points = np.random.uniform(-60, 60, size=(500, 2))
+    queries = np.random.uniform(-60, 60, size=(20, 2))
+    index = HaversineIndex(points)
+
+    distances, indices = index.query_radius(queries, 1500, unit=Unit.KILOMETERS)
+    expected = haversine_vector(points, queries, comb=True)
+    for row, d, i in zip(expected, distances, indices):
+        assert set(i) == set(np.flatnonzero(row <= 1500))
+        assert_allclose(d, np.sort(row[row <= 1500]))
@@ -1,5 +1,7 @@
+from importlib import import_module
 from haversine import inverse_haversine_vector, Unit, Direction
 from numpy import isclose
+import numpy as np
 from math import pi
 import pytest
 
@@ -51,4 +53,72 @@ def test_inverse_normalization():
     latArray, lngArray = result
 
     assert isclose(lngArray[0], 179.0, rtol=1e-5,).all()
-    assert isclose(lngArray[1], -0.840556, rtol=1e-5,).all()
\ No newline at end of file
+    assert isclose(lngArray[1], -0.840556, rtol=1e-5,).all()
+
+def test_inverse_haversine_vector_workers(monkeypatch):
+    monkeypatch.setattr(import_module('haversine.haversine'), '_PARALLEL_MIN_SIZE', 10)
+    points = np.random.uniform(-45, 45, size=(50, 2))
+    distances = np.random.uniform(0, 1000, size=50)
+    directions = np.random.uniform(0, 2 * pi, size=50)
+    expected = inverse_haversine_vector(points, distances, directions)
+
+    result = inverse_haversine_vector(points, distances, directions, workers=4)
+    assert isclose(result, expected).all()
+
+
+@pytest.mark.parametrize('normalize_output', [False, True])
+def test_inverse_haversine_vector_comb(normalize_output):
+    points = np.array([LYON, PARIS, (0.0, 179.9)])
+    distances = [10, 100, 1000]
+    directions = [Direction.NORTH, Direction.EAST, Direction.SOUTHWEST, 1.0]
+    lat, lng = inverse_haversine_vector(points, distances, directions, comb=True, normalize_output=normalize_output)
+    assert lat.shape == lng.shape == (3, 3, 4)
+
+    # Same as repeating the points for every distance and direction
+    repeated = inverse_haversine_vector(np.repeat(points, 12, axis=0), np.tile(np.repeat(distances, 4), 3),
+                                        np.tile(directions, 9), normalize_output=normalize_output)
+    assert isclose(lat.ravel(), repeated[0]).all()
+    assert isclose(lng.ravel(), repeated[1]).all()
+
+
+def test_inverse_haversine_vector_comb_workers(monkeypatch):
+    monkeypatch.setattr(import_module('haversine.haversine'), '_PARALLEL_MIN_SIZE', 10)
+    points = np.random.uniform(-45, 45, size=(50, 2))
+    distances = np.random.uniform(0, 1000, size=5)
+    directions = np.random.uniform(0, 2 * pi, size=8)
+    expected = inverse_haversine_vector(points, distances, directions, comb=True)
+
+    result = inverse_haversine_vector(points, distances, directions, comb=True, workers=4)
+    assert isclose(result, expected).all()
+
+
+def test_inverse_haversine_vector_comb_shapes():
+    lat, lng = inverse_haversine_vector(PARIS, 10, Direction.NORTH, comb=True)
+    assert lat.shape == (1, 1, 1)
+    assert isclose(lat[0, 0, 0], inverse_haversine_vector([PARIS], [10], [Direction.NORTH])[0][0])
+    with pytest.raises(IndexError):
+        inverse_haversine_vector([PARIS], [[10]], [Direction.NORTH], comb=True)
+
+
+@pytest.mark.parametrize('comb', [False, True])
+@pytest.mark.parametrize('normalize_output', [False, True])
+def test_inverse_haversine_vector_out(comb, normalize_output):
+    points = np.random.uniform(-89, 89, size=(20, 2))
+    distances = np.random.uniform(0, 5000, size=20)
+    directions = np.random.uniform(0, 2 * pi, size=20)
+    expected = inverse_haversine_vector(points, distances, directions, comb=comb, normalize_output=normalize_output)
+
+    # Non-contiguous buffers
+    out_lat, out_lng = np.empty((2,) + expected[0].shape)[1], np.empty(expected[0].shape + (2,))[..., 0]
+    lat, lng = inverse_haversine_vector(points, distances, directions, comb=comb, normalize_output=normalize_output,
+                                        out_lat=out_lat, out_lng=out_lng)
+    assert lat is out_lat and lng is out_lng
+    assert isclose(lat, expected[0]).all()
+    assert isclose(lng, expected[1]).all()
+
+
+def test_inverse_haversine_vector_out_shape():
+    with pytest.raises(ValueError):
+        inverse_haversine_vector([PARIS, LYON], [10, 10], [0, 0], out_lat=np.empty(1), out_lng=np.empty(1))
+    with pytest.raises(ValueError):
+        inverse_haversine_vector([PARIS, LYON], [10, 10], [0, 0], out_lat=np.empty(2))
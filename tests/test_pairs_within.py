@@ -0,0 +1,60 @@
+from haversine import haversine_vector, pairs_within, Unit
+from numpy.testing import assert_allclose, assert_array_equal
+import numpy as np
+import pytest
+
+
+def random_points(size):
+    # Uniform on the sphere, so that poles and the antimeridian are covered
+    return np.column_stack((np.degrees(np.arcsin(np.random.uniform(-1, 1, size))), np.random.uniform(-180, 180, size)))
+
+
+def expected_pairs(array1, array2, max_distance, unit=Unit.KILOMETERS):
+    matrix = haversine_vector(array1, array2, unit, comb=True)
+    j, i = np.nonzero(matrix <= max_distance)
+    order = np.lexsort((j, i))
+    return i[order], j[order], matrix[j, i][order]
+
+
+@pytest.mark.parametrize('max_distance', [0, 100, 1000, 5000, 12000, 30000])
+def test_pairs_within(max_distance):
+    array1, array2 = random_points(300), random_points(200)
+    i, j, distances = pairs_within(array1, array2, max_distance)
+    expected_i, expected_j, expected_distances = expected_pairs(array1, array2, max_distance)
+
+    assert_array_equal(i, expected_i)
+    assert_array_equal(j, expected_j)
+    assert_allclose(distances, expected_distances)
+
+
+def test_pairs_within_poles_and_antimeridian():
+    array1 = [(89.9, 0), (-89.9, 45), (0, 179.9), (10, -179.95)]
+    array2 = [(89.9, 180), (-89.95, -135), (0, -179.9), (10, 179.95), (0, 0)]
+    i, j, distances = pairs_within(array1, array2, 50, Unit.MILES)
+    expected_i, expected_j, expected_distances = expected_pairs(array1, array2, 50, Unit.MILES)
+
+    assert_array_equal(i, [0, 1, 2, 3])
+    assert_array_equal(j, [0, 1, 2, 3])
+    assert_allclose(distances, expected_distances)
+
+
+def test_pairs_within_chunks():
+    array1, array2 = random_points(200), random_points(200)
+    expected = pairs_within(array1, array2, 3000)
+    # A budget for a few candidates at once
+    for result, expected_array in zip(pairs_within(array1, array2, 3000, max_memory=1000), expected):
+        assert_array_equal(result, expected_array)
+
+
+def test_pairs_within_exact_distance():
+    array1, array2 = [(45.7597, 4.8422)], [(48.8567, 2.3508)]
+    distance = haversine_vector(array1, array2)[0]
+    assert len(pairs_within(array1, array2, distance)[0]) == 1
+    assert len(pairs_within(array1, array2, distance * (1 - 1e-9))[0]) == 0
+
+
+def test_pairs_within_check():
+    with pytest.raises(ValueError):
+        pairs_within([(91, 0)], [(0, 0)], 10)
+    i, j, distances = pairs_within([(91, 0)], [(89, 180)], 10, normalize=True)
+    assert_array_equal(i, [0])
@@ -0,0 +1,47 @@
+from haversine import haversine, path_length, path_lengths, cumulative_distance, Unit
+from numpy.testing import assert_allclose
+import numpy as np
+import pytest
+
+from tests.geo_ressources import LYON, PARIS, NEW_YORK, LONDON
+
+
+TRACK = [LYON, PARIS, LONDON, NEW_YORK]
+LEGS = [haversine(p1, p2, Unit.MILES) for p1, p2 in zip(TRACK, TRACK[1:])]
+
+
+def test_path_length():
+    assert path_length(TRACK, Unit.MILES) == pytest.approx(sum(LEGS))
+    assert path_length([LYON], Unit.MILES) == 0
+
+
+def test_cumulative_distance():
+    assert_allclose(cumulative_distance(TRACK, Unit.MILES), np.cumsum([0] + LEGS))
+    assert_allclose(cumulative_distance([LYON]), [0])
+
+
+def test_path_lengths():
+    points = np.array(TRACK + TRACK[::-1] + [PARIS])
+    lengths = path_lengths(points, [0, 4, 4, 8, 9], Unit.MILES)
+    assert_allclose(lengths, [sum(LEGS), 0, sum(LEGS), 0])
+
+
+def test_path_lengths_random():
+    points = np.random.uniform(-60, 60, size=(1000, 2))
+    offsets = np.concatenate([[0], np.sort(np.random.randint(0, 1000, size=50)), [1000]])
+    expected = [path_length(points[start:end]) if end > start else 0 for start, end in zip(offsets, offsets[1:])]
+    assert_allclose(path_lengths(points, offsets), expected)
+
+
+@pytest.mark.parametrize(
+    'offsets', [[0, 5], [-1, 2], [0, 3, 2, 4]]
+)
+def test_path_lengths_invalid_offsets(offsets):
+    with pytest.raises(ValueError):
+        path_lengths(TRACK, offsets)
+
+
+def test_path_length_normalization():
+    with pytest.raises(ValueError):
+        path_length([(0, 0), (0, 180.0001)])
+    assert path_length([(0, 0), (0, 180.0001)], normalize=True) == pytest.approx(path_length([(0, 0), (0, -179.9999)]))
@@ -1,9 +1,20 @@
 from .  import haversine_baseline as baseline
 import haversine as current
+import importlib.util
+import json
 import numpy as np
 import pytest
+import subprocess
+import sys
+import tracemalloc
+from pathlib import Path
 from timeit import timeit
 
+# The baseline imports numpy (and numba, making the scalar functions use it when installed)
+# eagerly, while the current version defers it to the first vector call: load it up front
+# to compare the same kernels.
+current.haversine_vector((0, 1), (2, 3))
+
 def assert_performance(func, number):
     # Interleave measurements and compare fastest current to median baseline.
     # All in an attempt to avoid spurious errors caused by fluctuating load on
@@ -53,3 +64,53 @@ def test_inverse_haversine_vector():
     arr = np.random.uniform(size=(1000, 2))
     assert_performance(lambda m: m.inverse_haversine_vector(arr, *arr.T),
                        number=1000)
+
+
+def import_time(module):
+    # Best of a few fresh interpreters, as the module would be imported by a new process
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    return min(float(subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout)
+               for _ in range(3))
+
+
+def test_vector_out_allocation():
+    # With out buffers, the numba kernels write the results in place without allocating any array
+    pytest.importorskip('numba')
+    points = np.random.uniform(-45, 45, size=(10000, 2))
+    out, out_lat, out_lng = np.empty(10000), np.empty(10000), np.empty(10000)
+    calls = [lambda: current.haversine_vector(points, points, out=out, backend='numba'),
+             lambda: current.inverse_haversine_vector(points, out, out, out_lat=out_lat, out_lng=out_lng,
+                                                      backend='numba')]
+    for call in calls:
+        call()
+        tracemalloc.start()
+        call()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert peak < out.nbytes
+
+
+def test_import_time():
+    """
+    Importing haversine for scalar computations must not pay for importing numpy and numba.
+    """
+    code = ("import sys, haversine; haversine.haversine((0, 1), (2, 3)); haversine.inverse_haversine((0, 1), 2, 3); "
+            "assert 'numpy' not in sys.modules and 'numba' not in sys.modules")
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+    assert import_time('haversine') < 0.5 * import_time('tests.haversine_baseline')
+
+
+def test_benchmark_script(tmp_path):
+    path = Path(__file__).resolve().parent.parent / 'benchmarks' / 'bench_haversine.py'
+    spec = importlib.util.spec_from_file_location('bench_haversine', path)
+    bench = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(bench)
+
+    results = tmp_path / 'results.json'
+    assert bench.main(['--max-size', '10', '--min-time', '0', '--json', str(results)]) == 0
+    saved = json.loads(results.read_text())['results']
+    assert {result['case'] for result in saved} == set(bench.CASES)
+    assert all(result['points_per_second'] > 0 for result in saved)
+    assert bench.main(['--max-size', '10', '--min-time', '0', '--case', 'vector', '--compare', str(results),
+                       '--threshold', '1e9']) == 0
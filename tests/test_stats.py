@@ -0,0 +1,66 @@
+from haversine import (haversine_vector, haversine_vector_columns, haversine_pdist, inverse_haversine_vector,
+                       pairs_within, HaversineGrid, enable_stats, disable_stats, reset_stats, stats)
+import numpy as np
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def stats_enabled():
+    reset_stats()
+    enable_stats()
+    yield
+    disable_stats()
+    reset_stats()
+
+
+def test_stats():
+    points1 = np.random.uniform(-45, 45, size=(20, 2))
+    points2 = np.random.uniform(-45, 45, size=(10, 2))
+    haversine_vector(points1, points1)
+    haversine_vector(points1, points2, comb=True, normalize=True)
+    haversine_vector_columns(*points1.T, *points1.T)
+    haversine_pdist(points1)
+    inverse_haversine_vector(points1, np.ones(20), np.ones(20), normalize_output=True)
+
+    recorded = stats()
+    assert recorded['functions']['haversine_vector']['calls'] == 2
+    assert recorded['functions']['haversine_vector']['elements'] == 20 + 200
+    assert recorded['functions']['haversine_vector_columns']['elements'] == 20
+    assert recorded['functions']['haversine_pdist']['elements'] == 190
+    assert recorded['functions']['inverse_haversine_vector']['elements'] == 20
+    assert recorded['stages']['convert']['elements'] == 20 * 2 + 30 + 20 * 2 + 20
+    assert recorded['stages']['check']['elements'] == 20 * 2 + 20 * 2 + 20
+    assert recorded['stages']['normalize']['elements'] == 30 + 20
+    assert recorded['stages']['kernel']['calls'] == 5
+    assert all(counters['seconds'] > 0 for entries in recorded.values() for counters in entries.values())
+
+
+def test_stats_disabled():
+    points = np.random.uniform(-45, 45, size=(20, 2))
+    haversine_vector(points, points)
+    disable_stats()
+    haversine_vector(points, points)
+    assert stats()['functions']['haversine_vector']['calls'] == 1
+
+    reset_stats()
+    assert stats() == {'functions': {}, 'stages': {}}
+
+
+def test_stats_stages_of_instrumented_calls_only():
+    points = np.random.uniform(-45, 45, size=(20, 2))
+    # Functions that are not instrumented record no stages either
+    pairs_within(points, points, 1000)
+    HaversineGrid(points).join(points, 1000)
+    assert stats() == {'functions': {}, 'stages': {}}
+
+    # Nor do they after an instrumented call failed
+    with pytest.raises(ValueError):
+        haversine_vector(points, points + [100, 0])
+    reset_stats()
+    pairs_within(points, points, 1000)
+    assert stats() == {'functions': {}, 'stages': {}}
+
+    haversine_vector(points, points, normalize=True)
+    recorded = stats()
+    assert recorded['stages']['convert']['calls'] == recorded['stages']['normalize']['calls'] == 2
+    assert recorded['stages']['kernel']['calls'] == recorded['functions']['haversine_vector']['calls'] == 1